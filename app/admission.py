@@ -0,0 +1,276 @@
+# app/admission.py
+"""
+Control de admisión para las llamadas a OpenAI (tts / transcribe).
+
+Cada AdmissionController limita cuántas llamadas upstream hay en vuelo a la
+vez en el proceso, con una cola de espera acotada. Si la cola está llena o se
+espera demasiado se rechaza enseguida con 503 + Retry-After en vez de acumular
+peticiones hasta que todo hace timeout. Las llamadas se reintentan con backoff
+exponencial con jitter ante errores transitorios, y un circuit breaker corta
+el tráfico un rato cuando el upstream falla de forma continuada.
+
+Las llamadas al SDK de OpenAI son síncronas, así que se ejecutan en el
+threadpool para no bloquear el event loop. El código que ya corre en un hilo
+del threadpool (los trabajos de jobs.py) usa `run_sync`, que pasa por el
+mismo controlador del event loop.
+"""
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+import anyio.from_thread
+import openai
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+# Errores del SDK de OpenAI que merece la pena reintentar
+TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (
+    openai.APIConnectionError,  # incluye APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+class AdmissionError(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Overloaded(AdmissionError):
+    pass
+
+
+class CircuitOpen(AdmissionError):
+    pass
+
+
+class CircuitBreaker:
+    """closed -> open tras N fallos seguidos -> half-open (una prueba) -> closed."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "open":
+                remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+                if remaining > 0:
+                    raise CircuitOpen("Upstream temporarily unavailable", retry_after=max(1, int(remaining + 0.999)))
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probe_in_flight:
+                    raise CircuitOpen("Upstream temporarily unavailable", retry_after=1)
+                self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        # La llamada terminó con un error que no dice nada del upstream (p.ej. 400)
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._queued = 0
+        self._latencies: deque = deque(maxlen=1000)
+        self._counters: Dict[str, int] = {
+            "admitted": 0,
+            "rejected_queue_full": 0,
+            "rejected_queue_timeout": 0,
+            "rejected_circuit_open": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "retries": 0,
+        }
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str) -> "AdmissionController":
+        return cls(
+            name,
+            max_concurrency=_env_int(f"{prefix}_MAX_CONCURRENCY", 8),
+            max_queue=_env_int(f"{prefix}_MAX_QUEUE", 32),
+            queue_timeout=_env_float(f"{prefix}_QUEUE_TIMEOUT", 5.0),
+            retries=_env_int(f"{prefix}_RETRIES", 2),
+            failure_threshold=_env_int(f"{prefix}_BREAKER_FAILURES", 5),
+            reset_timeout=_env_float(f"{prefix}_BREAKER_RESET", 30.0),
+        )
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Un semáforo por event loop (en producción sólo hay uno)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _retry_after(self) -> int:
+        # Estimación grosera: lo que tarda en drenarse la cola con la latencia media
+        if not self._latencies:
+            return 1
+        mean = sum(self._latencies) / len(self._latencies)
+        return max(1, int(mean * (self._queued + 1) / self.max_concurrency + 0.999))
+
+    async def _acquire(self) -> None:
+        semaphore = self._get_semaphore()
+        if not semaphore.locked():
+            # Hay hueco: acquire() retorna sin suspender la corrutina
+            await semaphore.acquire()
+            return
+        if self._queued >= self.max_queue:
+            self._counters["rejected_queue_full"] += 1
+            raise Overloaded("Too many concurrent requests", retry_after=self._retry_after())
+
+        self._queued += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._counters["rejected_queue_timeout"] += 1
+            raise Overloaded("Too many concurrent requests", retry_after=self._retry_after())
+        finally:
+            self._queued -= 1
+
+    async def _call_with_retries(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return await run_in_threadpool(fn, *args, **kwargs)
+            except TRANSIENT_ERRORS:
+                if attempt >= self.retries:
+                    raise
+                # Backoff exponencial con "full jitter"
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                attempt += 1
+                self._counters["retries"] += 1
+                await asyncio.sleep(delay)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        try:
+            self.breaker.before_call()
+        except CircuitOpen:
+            self._counters["rejected_circuit_open"] += 1
+            raise
+
+        # Cualquier salida sin éxito ni fallo del upstream (cola llena, error
+        # 4xx, cancelación del cliente...) libera la prueba del half-open
+        recorded = False
+        try:
+            await self._acquire()
+
+            self._counters["admitted"] += 1
+            self._in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = await self._call_with_retries(fn, *args, **kwargs)
+            except TRANSIENT_ERRORS:
+                self._counters["failed"] += 1
+                self.breaker.record_failure()
+                recorded = True
+                raise
+            except Exception:
+                self._counters["failed"] += 1
+                raise
+            else:
+                self._counters["succeeded"] += 1
+                self.breaker.record_success()
+                recorded = True
+                return result
+            finally:
+                self._latencies.append(time.perf_counter() - started)
+                self._in_flight -= 1
+                self._get_semaphore().release()
+        finally:
+            if not recorded:
+                self.breaker.release()
+
+    def run_sync(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """`run` desde un hilo del threadpool de anyio/Starlette (bloquea el hilo, no el loop)."""
+        return anyio.from_thread.run(lambda: self.run(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "circuit": self.breaker.state,
+            **self._counters,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+            },
+        }
+
+
+def to_http_exception(exc: AdmissionError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+transcription_admission = AdmissionController.from_env("transcribe", "TRANSCRIBE")
+speech_admission = AdmissionController.from_env("tts", "TTS")
@@ -0,0 +1,242 @@
+# app/archive.py
+"""
+Archivo de pedidos terminados (almacenamiento caliente / frío).
+
+`orders` y `order_items` sólo crecen, y cada consulta, índice y VACUUM paga
+por años de pedidos entregados o cancelados que casi nunca se leen. Este
+módulo mueve los pedidos terminados (ARCHIVED_ORDER_STATUSES) con más de
+ARCHIVE_AFTER_DAYS días a `orders_archive` / `order_items_archive`:
+
+    python -m app.archive --older-than-days 30 --report
+
+Se trabaja por lotes de ARCHIVE_BATCH_SIZE pedidos, cada uno en su propia
+transacción corta (INSERT ... SELECT + DELETE), con una pausa entre lotes
+para no acaparar locks ni la escritura de SQLite. En Postgres los pedidos
+del lote se bloquean con SKIP LOCKED, así que no se espera a pedidos que
+alguien esté modificando. `crud.get_order` y el historial del cliente leen
+también del archivo, de forma transparente para la API.
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from . import crud, migrations, models
+from .database import Base, SessionLocal, engine
+
+ARCHIVED_ORDER_STATUSES = ("delivered", "cancelled")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+ARCHIVE_BATCH_PAUSE = float(os.getenv("ARCHIVE_BATCH_PAUSE", "0.05"))
+
+_orders = models.Order.__table__
+_order_items = models.OrderItem.__table__
+_orders_archive = models.ArchivedOrder.__table__
+_order_items_archive = models.ArchivedOrderItem.__table__
+
+# Columnas comunes: si se añade una columna a orders hay que añadirla al archivo
+_ORDER_COLUMNS = [c.name for c in _orders.columns]
+_ORDER_ITEM_COLUMNS = [c.name for c in _order_items.columns]
+
+
+def archive_batch(db: Session, before: datetime, limit: int) -> int:
+    """Archiva hasta `limit` pedidos terminados creados antes de `before`."""
+    archivable = (
+        _orders.c.status.in_(ARCHIVED_ORDER_STATUSES),
+        _orders.c.created_at < before,
+    )
+    if engine.dialect.name == "sqlite":
+        # Tablas creadas sin AUTOINCREMENT (anteriores a sqlite_autoincrement
+        # en models): el siguiente id es max(id) + 1, así que si se archiva el
+        # pedido más reciente su id se reutilizaría y chocaría con el archivo
+        archivable += (_orders.c.id < select(func.max(_orders.c.id)).scalar_subquery(),)
+    query = (
+        select(_orders.c.id)
+        .where(*archivable)
+        .order_by(_orders.c.id)
+        .limit(limit)
+    )
+    if engine.dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+
+    ids = db.execute(query).scalars().all()
+    if not ids:
+        db.rollback()
+        return 0
+
+    # Las condiciones se repiten en cada sentencia: en SQLite (o en Postgres
+    # sin el FOR UPDATE) un pedido del lote puede haber vuelto a un estado
+    # activo entre la selección y el movimiento, y entonces se queda donde está
+    selected = (_orders.c.id.in_(ids), *archivable)
+    selected_items = _order_items.c.order_id.in_(select(_orders.c.id).where(*selected))
+    try:
+        db.execute(
+            insert(_orders_archive).from_select(
+                _ORDER_COLUMNS,
+                select(*[_orders.c[name] for name in _ORDER_COLUMNS]).where(*selected),
+            )
+        )
+        db.execute(
+            insert(_order_items_archive).from_select(
+                _ORDER_ITEM_COLUMNS,
+                select(*[_order_items.c[name] for name in _ORDER_ITEM_COLUMNS]).where(selected_items),
+            )
+        )
+        db.execute(delete(_order_items).where(selected_items))
+        moved = db.execute(delete(_orders).where(*selected)).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return moved
+
+
+def archive_orders(
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+    pause: float = ARCHIVE_BATCH_PAUSE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Archiva por lotes hasta que no quede nada (o `max_batches`). Devuelve el total."""
+    before = models.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+    batches = 0
+    db = SessionLocal()
+    try:
+        while max_batches is None or batches < max_batches:
+            moved = archive_batch(db, before, batch_size)
+            if not moved:
+                break
+            archived += moved
+            batches += 1
+            if progress:
+                progress(archived)
+            time.sleep(pause)
+    finally:
+        db.close()
+    return archived
+
+
+# ---------- Informe ----------
+
+def _table_sizes(db: Session, tables: Sequence[str]) -> Dict[str, Dict[str, int]]:
+    sizes = {}
+    for table in tables:
+        size = {"rows": db.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()}
+        if engine.dialect.name == "postgresql":
+            size["bytes"] = db.execute(text(f"SELECT pg_total_relation_size('{table}')")).scalar()
+        sizes[table] = size
+    if engine.dialect.name == "sqlite":
+        # SQLite no devuelve el espacio al sistema sin VACUUM: las páginas
+        # liberadas quedan en la freelist y se reutilizan
+        page_size = db.execute(text("PRAGMA page_size")).scalar()
+        sizes["sqlite"] = {
+            "bytes": db.execute(text("PRAGMA page_count")).scalar() * page_size,
+            "free_bytes": db.execute(text("PRAGMA freelist_count")).scalar() * page_size,
+        }
+    return sizes
+
+
+def _timed_ms(fn: Callable[[], object], repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return round(sorted(timings)[len(timings) // 2] * 1000, 2)
+
+
+def _hot_latencies(db: Session) -> Dict[str, float]:
+    """Mediana de las lecturas calientes más habituales sobre los datos actuales."""
+    busiest_restaurant = db.execute(
+        select(_orders.c.restaurant_id).group_by(_orders.c.restaurant_id)
+        .order_by(func.count().desc()).limit(1)
+    ).scalar()
+    busiest_customer = db.execute(
+        select(_orders.c.customer_id).group_by(_orders.c.customer_id)
+        .order_by(func.count().desc()).limit(1)
+    ).scalar()
+    latest_order = db.execute(select(func.max(_orders.c.id))).scalar()
+    if busiest_restaurant is None:
+        return {}
+
+    def run(fn: Callable[[], object]) -> Callable[[], object]:
+        def call() -> object:
+            result = fn()
+            db.expunge_all()  # medir consultas, no la identity map
+            return result
+        return call
+
+    return {
+        "kitchen_queue_ms": _timed_ms(run(lambda: crud.list_restaurant_orders(db, busiest_restaurant))),
+        "customer_history_ms": _timed_ms(run(lambda: crud.list_orders_by_customer(db, busiest_customer))),
+        "get_order_ms": _timed_ms(run(lambda: crud.get_order(db, latest_order))),
+        "count_by_restaurant_ms": _timed_ms(run(lambda: db.execute(
+            select(_orders.c.status, func.count()).where(_orders.c.restaurant_id == busiest_restaurant)
+            .group_by(_orders.c.status)
+        ).all())),
+    }
+
+
+def report(db: Session) -> Dict[str, object]:
+    tables = [t.name for t in (_orders, _order_items, _orders_archive, _order_items_archive)]
+    return {"sizes": _table_sizes(db, tables), "latency": _hot_latencies(db)}
+
+
+def _print_report(title: str, data: Dict[str, object]) -> None:
+    print(title)
+    for table, size in data["sizes"].items():
+        print(f"  {table}: " + ", ".join(f"{k}={v:,}" for k, v in size.items()))
+    for name, value in data["latency"].items():
+        print(f"  {name}: {value}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Archiva los pedidos terminados antiguos.")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    parser.add_argument("--pause", type=float, default=ARCHIVE_BATCH_PAUSE,
+                        help="segundos de pausa entre lotes")
+    parser.add_argument("--report", action="store_true",
+                        help="mostrar tamaño de las tablas y latencia de lecturas antes y después")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    if args.report:
+        db = SessionLocal()
+        try:
+            _print_report("Antes:", report(db))
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+
+    def progress(done: int) -> None:
+        print(f"  {done} pedidos archivados ({done / (time.perf_counter() - started):,.0f}/s)", flush=True)
+
+    archived = archive_orders(
+        older_than_days=args.older_than_days,
+        batch_size=args.batch_size,
+        max_batches=args.max_batches,
+        pause=args.pause,
+        progress=progress,
+    )
+    print(f"{archived} pedidos archivados en {time.perf_counter() - started:.1f}s")
+
+    if args.report:
+        db = SessionLocal()
+        try:
+            _print_report("Después:", report(db))
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
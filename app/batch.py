@@ -0,0 +1,189 @@
+# app/batch.py
+"""
+Ejecución de varias operaciones crud en una sola petición y transacción.
+
+La sesión se abre sobre una conexión con una transacción externa y
+`join_transaction_mode="create_savepoint"`: los `db.commit()` que hacen las
+funciones de crud sólo liberan un SAVEPOINT, y el commit real se hace una vez
+al final del lote. Si una operación falla, `db.rollback()` deshace sólo su
+savepoint; en modo atómico se deshace además todo el lote.
+
+Los argumentos pueden referirse a resultados anteriores con cadenas
+"$<ref>.<campo>", donde <ref> es el `id` de una operación previa o su
+posición en la lista (p.ej. "$cliente.id" o "$0.id").
+"""
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from . import crud, schemas
+from .database import SavepointSessionLocal, savepoint_engine
+from .search import menu_index
+
+MAX_BATCH_OPERATIONS = int(os.getenv("MAX_BATCH_OPERATIONS", "25"))
+
+_REF_RE = re.compile(r"^\$([A-Za-z0-9_-]+)\.([A-Za-z0-9_]+)$")
+
+
+class BatchOperationError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _create(fn: Callable, schema: Type[BaseModel]) -> Callable[[Session, dict], Any]:
+    return lambda db, args: fn(db, schema(**args))
+
+
+def _get(fn: Callable, key: str) -> Callable[[Session, dict], Any]:
+    return lambda db, args: fn(db, args[key])
+
+
+def _update(fn: Callable, key: str, schema: Type[BaseModel]) -> Callable[[Session, dict], Any]:
+    def run(db: Session, args: dict) -> Any:
+        data = {k: v for k, v in args.items() if k != key}
+        return fn(db, args[key], schema(**data))
+    return run
+
+
+def _delete(fn: Callable, key: str) -> Callable[[Session, dict], Any]:
+    return lambda db, args: {"deleted": True} if fn(db, args[key]) else None
+
+
+# nombre -> (función, esquema de respuesta o None si ya devuelve un dict)
+OPERATIONS: Dict[str, Tuple[Callable[[Session, dict], Any], Optional[Type[BaseModel]]]] = {
+    "restaurant.create": (_create(crud.create_restaurant, schemas.RestaurantCreate), schemas.RestaurantRead),
+    "restaurant.get": (_get(crud.get_restaurant, "restaurant_id"), schemas.RestaurantRead),
+    "restaurant.update": (_update(crud.update_restaurant, "restaurant_id", schemas.RestaurantUpdate), schemas.RestaurantRead),
+    "restaurant.delete": (_delete(crud.delete_restaurant, "restaurant_id"), None),
+    "menu_category.create": (_create(crud.create_menu_category, schemas.MenuCategoryCreate), schemas.MenuCategoryRead),
+    "menu_category.get": (_get(crud.get_menu_category, "category_id"), schemas.MenuCategoryRead),
+    "menu_category.update": (_update(crud.update_menu_category, "category_id", schemas.MenuCategoryBase), schemas.MenuCategoryRead),
+    "menu_category.delete": (_delete(crud.delete_menu_category, "category_id"), None),
+    "menu_item.create": (_create(crud.create_menu_item, schemas.MenuItemCreate), schemas.MenuItemRead),
+    "menu_item.get": (_get(crud.get_menu_item, "menu_item_id"), schemas.MenuItemRead),
+    "menu_item.update": (_update(crud.update_menu_item, "menu_item_id", schemas.MenuItemUpdate), schemas.MenuItemRead),
+    "menu_item.delete": (_delete(crud.delete_menu_item, "menu_item_id"), None),
+    "customer.get_or_create": (_create(crud.get_or_create_customer, schemas.CustomerCreate), schemas.CustomerRead),
+    "customer.get": (_get(crud.get_customer, "customer_id"), schemas.CustomerRead),
+    "customer.update": (_update(crud.update_customer, "customer_id", schemas.CustomerUpdate), schemas.CustomerRead),
+    "customer.delete": (_delete(crud.delete_customer, "customer_id"), None),
+    "order.create": (_create(crud.create_order, schemas.OrderCreate), schemas.OrderRead),
+    "order.get": (_get(crud.get_order, "order_id"), schemas.OrderRead),
+    "order.update": (_update(crud.update_order, "order_id", schemas.OrderUpdate), schemas.OrderRead),
+    "order.delete": (_delete(crud.delete_order, "order_id"), None),
+}
+
+
+def _resolve(value: Any, results: Dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        match = _REF_RE.match(value)
+        if not match:
+            return value
+        ref, field = match.groups()
+        if ref not in results:
+            raise BatchOperationError(400, f"Unknown reference '{ref}'")
+        result = results[ref]
+        if not isinstance(result, dict) or field not in result:
+            raise BatchOperationError(400, f"Reference '{ref}' has no field '{field}'")
+        return result[field]
+    if isinstance(value, dict):
+        return {k: _resolve(v, results) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, results) for v in value]
+    return value
+
+
+def _run_operation(db: Session, operation: schemas.BatchOperation, results: Dict[str, Any]) -> Any:
+    if operation.op not in OPERATIONS:
+        raise BatchOperationError(400, f"Unknown operation '{operation.op}'")
+    fn, read_schema = OPERATIONS[operation.op]
+
+    args = _resolve(operation.args, results)
+    try:
+        obj = fn(db, args)
+    except KeyError as e:
+        raise BatchOperationError(400, f"Missing argument {e}")
+    except ValidationError as e:
+        raise BatchOperationError(422, str(e))
+    except crud.VersionConflict as e:
+        raise BatchOperationError(409, str(e))
+    except ValueError as e:
+        raise BatchOperationError(400, str(e))
+    # Errores de la base de datos: execute() deshace el savepoint de la
+    # operación y el resto del lote sigue como con cualquier otro fallo
+    except IntegrityError as e:
+        raise BatchOperationError(409, f"Integrity error: {e.orig}")
+    except SQLAlchemyError as e:
+        raise BatchOperationError(500, f"Database error: {e.__class__.__name__}")
+
+    if obj is None:
+        raise BatchOperationError(404, "Not found")
+    if read_schema is None:
+        return obj
+    return read_schema.model_validate(obj).model_dump(mode="json")
+
+
+def execute(batch_in: schemas.BatchRequest) -> schemas.BatchResponse:
+    started = time.perf_counter()
+    results: Dict[str, Any] = {}
+    op_results: List[schemas.BatchOperationResult] = []
+    failed = False
+
+    with savepoint_engine.connect() as conn:
+        trans = conn.begin()
+        db = SavepointSessionLocal(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            for position, operation in enumerate(batch_in.operations):
+                op_started = time.perf_counter()
+                if failed and batch_in.atomic:
+                    op_results.append(schemas.BatchOperationResult(
+                        id=operation.id, op=operation.op, status=424,
+                        error="Skipped: a previous operation failed",
+                    ))
+                    continue
+
+                try:
+                    result = _run_operation(db, operation, results)
+                except BatchOperationError as e:
+                    db.rollback()  # sólo el savepoint de esta operación
+                    failed = True
+                    op_results.append(schemas.BatchOperationResult(
+                        id=operation.id, op=operation.op, status=e.status, error=str(e),
+                        elapsed_ms=round((time.perf_counter() - op_started) * 1000, 3),
+                    ))
+                    continue
+
+                results[str(position)] = result
+                if operation.id:
+                    results[operation.id] = result
+                op_results.append(schemas.BatchOperationResult(
+                    id=operation.id, op=operation.op, status=200, result=result,
+                    elapsed_ms=round((time.perf_counter() - op_started) * 1000, 3),
+                ))
+
+            committed = not (failed and batch_in.atomic)
+            if committed:
+                trans.commit()
+            else:
+                trans.rollback()
+        except Exception:
+            trans.rollback()
+            committed = False
+            raise
+        finally:
+            db.close()
+            if not committed and any(o.op.startswith("menu_item.") for o in batch_in.operations):
+                # El índice de búsqueda se actualizó con cambios que no llegaron a la DB
+                menu_index.invalidate()
+
+    return schemas.BatchResponse(
+        committed=committed,
+        results=op_results,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
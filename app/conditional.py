@@ -0,0 +1,92 @@
+# app/conditional.py
+"""
+Peticiones condicionales para los recursos con columna `version`
+(Restaurant, MenuItem, MenuCategory, Customer).
+
+GET por id: si el `If-None-Match` (o `If-Modified-Since`) del cliente sigue
+siendo válido se responde 304 tras una única consulta por clave primaria a
+(version, updated_at), sin cargar ni serializar la fila. Si no, la
+respuesta lleva `ETag` y `Last-Modified`.
+
+PUT: con `If-Match` sólo se actualiza si el ETag es el actual (comparación
+fuerte: un `W/"..."` no vale); si no, 412.
+La versión esperada se pasa a crud, que la vuelve a comprobar en el propio
+UPDATE (version_id_col), así que dos PUT simultáneos no se pisan.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from . import reads
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite devuelve las fechas sin zona; se guardan en UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def etag(version: int, updated_at: Optional[datetime]) -> str:
+    # updated_at distingue una fila nueva que reutiliza el id de otra borrada
+    stamp = int(_utc(updated_at).timestamp() * 1_000_000) if updated_at else 0
+    return f'"{version}-{stamp}"'
+
+
+def _matches(header: str, current: str, weak: bool = True) -> bool:
+    # If-None-Match compara en débil (W/"..." vale); If-Match sólo en fuerte
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or current in tags or (weak and f"W/{current}" in tags)
+
+
+def set_headers(response: Response, obj: Any) -> None:
+    response.headers["ETag"] = etag(obj.version, obj.updated_at)
+    if obj.updated_at:
+        response.headers["Last-Modified"] = format_datetime(_utc(obj.updated_at), usegmt=True)
+
+
+def not_modified(request: Request, db: Session, model: Any, row_id: int) -> Optional[Response]:
+    """Respuesta 304 si la copia del cliente sigue al día; None si hay que enviarla."""
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_none_match and not if_modified_since:
+        return None
+
+    row = reads.row_version(db, model, row_id)
+    if row is None:
+        return None  # la ruta responderá 404
+
+    current = etag(row.version, row.updated_at)
+    if if_none_match:
+        fresh = _matches(if_none_match, current)
+    else:
+        try:
+            since = _utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return None
+        # Last-Modified sólo tiene precisión de segundos
+        fresh = row.updated_at is not None and _utc(row.updated_at).replace(microsecond=0) <= since
+    if not fresh:
+        return None
+
+    response = Response(status_code=304)
+    set_headers(response, row)
+    return response
+
+
+def expected_version(request: Request, db: Session, model: Any, row_id: int) -> Optional[int]:
+    """Versión que exige el `If-Match` del PUT (None si no lo hay); 412 si ya no es la actual."""
+    if_match = request.headers.get("if-match")
+    if not if_match:
+        return None
+    row = reads.row_version(db, model, row_id)
+    if row is None:
+        return None  # la ruta responderá 404
+    if not _matches(if_match, etag(row.version, row.updated_at), weak=False):
+        raise precondition_failed()
+    return row.version
+
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(status_code=412, detail="Resource has been modified")
@@ -1,9 +1,30 @@
 # app/crud.py
-from decimal import Decimal
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import and_, bindparam, or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.exc import StaleDataError
 
-from . import models, schemas
+from . import followups, models, pricing, schemas, snapshots
+from .search import menu_index
+
+
+class VersionConflict(Exception):
+    """El recurso ha cambiado desde la versión que espera el cliente (If-Match)."""
+
+
+def _check_version(obj, expected_version: Optional[int]) -> None:
+    if expected_version is not None and obj.version != expected_version:
+        raise VersionConflict("Resource has been modified")
+
+
+def _commit_versioned(db: Session) -> None:
+    # version_id_col: el UPDATE lleva "AND version = ?" y falla si otro lo ha cambiado antes
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise VersionConflict("Resource has been modified")
 
 
 # ---------- Restaurant ----------
@@ -26,17 +47,19 @@ def update_restaurant(
     db: Session,
     restaurant_id: int,
     restaurant_in: schemas.RestaurantUpdate,
+    expected_version: Optional[int] = None,
 ) -> Optional[models.Restaurant]:
     restaurant = get_restaurant(db, restaurant_id)
     if not restaurant:
         return None
+    _check_version(restaurant, expected_version)
 
     data = restaurant_in.model_dump(exclude_unset=True)
     for field, value in data.items():
         setattr(restaurant, field, value)
 
     db.add(restaurant)
-    db.commit()
+    _commit_versioned(db)
     db.refresh(restaurant)
     return restaurant
 
@@ -47,15 +70,20 @@ def delete_restaurant(db: Session, restaurant_id: int) -> bool:
 
     db.delete(restaurant)
     db.commit()
+    menu_index.invalidate(restaurant_id)
+    snapshots.invalidate(db, restaurant_id)
     return True
 
 
 # ---------- Menu Item ----------
 def create_menu_item(db: Session, item_in: schemas.MenuItemCreate) -> models.MenuItem:
     item = models.MenuItem(**item_in.model_dump())
+    pricing.apply_effective_price(item)
     db.add(item)
     db.commit()
     db.refresh(item)
+    menu_index.item_changed(item)
+    snapshots.refresh(db, item.restaurant_id, (snapshots.MENU_ITEMS,))
     return item
 
 
@@ -77,22 +105,52 @@ def get_menu_item(db: Session, menu_item_id: int) -> Optional[models.MenuItem]:
     return db.query(models.MenuItem).filter(models.MenuItem.id == menu_item_id).first()
 
 
+def search_menu_items(
+    db: Session,
+    restaurant_id: int,
+    query: str,
+    limit: int = 20,
+) -> List[models.MenuItem]:
+    ranked = menu_index.get(db, restaurant_id).search(query, limit=limit)
+    if not ranked:
+        return []
+
+    ids = [item_id for item_id, _ in ranked]
+    items = {
+        item.id: item
+        for item in db.query(models.MenuItem).filter(
+            models.MenuItem.id.in_(ids),
+            # El índice puede ir por detrás de la base de datos
+            models.MenuItem.restaurant_id == restaurant_id,
+            models.MenuItem.is_available == True,
+        )
+    }
+    # Mantener el orden por relevancia del índice
+    return [items[item_id] for item_id in ids if item_id in items]
+
+
 def update_menu_item(
     db: Session,
     menu_item_id: int,
     item_in: schemas.MenuItemUpdate,
+    expected_version: Optional[int] = None,
 ) -> Optional[models.MenuItem]:
     item = get_menu_item(db, menu_item_id)
     if not item:
         return None
+    _check_version(item, expected_version)
 
     data = item_in.model_dump(exclude_unset=True)
     for field, value in data.items():
         setattr(item, field, value)
+    if "price" in data or "discount" in data:
+        pricing.apply_effective_price(item)
 
     db.add(item)
-    db.commit()
+    _commit_versioned(db)
     db.refresh(item)
+    menu_index.item_changed(item)
+    snapshots.refresh(db, item.restaurant_id, (snapshots.MENU_ITEMS,))
     return item
 
 
@@ -101,8 +159,11 @@ def delete_menu_item(db: Session, menu_item_id: int) -> bool:
     if not item:
         return False
 
+    restaurant_id = item.restaurant_id
     db.delete(item)
     db.commit()
+    menu_index.item_removed(menu_item_id, restaurant_id)
+    snapshots.refresh(db, restaurant_id, (snapshots.MENU_ITEMS,))
     return True
 
 
@@ -131,17 +192,19 @@ def update_customer(
     db: Session,
     customer_id: int,
     customer_in: schemas.CustomerUpdate,
+    expected_version: Optional[int] = None,
 ) -> Optional[models.Customer]:
     customer = get_customer(db, customer_id)
     if not customer:
         return None
+    _check_version(customer, expected_version)
 
     data = customer_in.model_dump(exclude_unset=True)
     for field, value in data.items():
         setattr(customer, field, value)
 
     db.add(customer)
-    db.commit()
+    _commit_versioned(db)
     db.refresh(customer)
     return customer
 
@@ -158,7 +221,8 @@ def delete_customer(db: Session, customer_id: int) -> bool:
 
 
 # ---------- Order ----------
-def create_order(db: Session, order_in: schemas.OrderCreate) -> models.Order:
+def add_order(db: Session, order_in: schemas.OrderCreate) -> models.Order:
+    """Valida y añade el pedido a la sesión sin hacer commit (ver ingest.py)."""
     restaurant = db.query(models.Restaurant).filter(models.Restaurant.id == order_in.restaurant_id).first()
     if not restaurant:
         raise ValueError("Restaurant not found")
@@ -167,30 +231,31 @@ def create_order(db: Session, order_in: schemas.OrderCreate) -> models.Order:
     if not customer:
         raise ValueError("Customer not found")
 
-    # Calculamos total usando los precios actuales
-    total = Decimal("0.00")
-    order_items_models: List[models.OrderItem] = []
+    # Calculamos total usando los precios actuales, con una sola consulta a la carta
+    ids = {item_in.menu_item_id for item_in in order_in.items}
+    menu_items = {
+        item.id: item
+        for item in db.query(models.MenuItem).filter(models.MenuItem.id.in_(ids)).all()
+    }
 
+    lines = []
     for item_in in order_in.items:
-        menu_item = db.query(models.MenuItem).filter(models.MenuItem.id == item_in.menu_item_id).first()
+        menu_item = menu_items.get(item_in.menu_item_id)
         if not menu_item or not menu_item.is_available:
             raise ValueError(f"Menu item {item_in.menu_item_id} not available")
-
-        unit_price = Decimal(menu_item.price)
-        if menu_item.discount:
-          discount_price = Decimal(menu_item.discount)
-          unit_price = unit_price - ((discount_price/100) * unit_price)
-        
-        subtotal = unit_price * item_in.quantity
-        total += subtotal
-
-        order_item = models.OrderItem(
-            menu_item_id=menu_item.id,
-            quantity=item_in.quantity,
-            unit_price=unit_price,
-            subtotal=subtotal,
+        lines.append((menu_item, item_in.quantity))
+
+    priced = pricing.price_order(lines)
+    total = priced.total
+    order_items_models: List[models.OrderItem] = [
+        models.OrderItem(
+            menu_item_id=line.menu_item_id,
+            quantity=line.quantity,
+            unit_price=line.unit_price,
+            subtotal=line.subtotal,
         )
-        order_items_models.append(order_item)
+        for line in priced.lines
+    ]
 
     order = models.Order(
         restaurant_id=order_in.restaurant_id,
@@ -206,31 +271,125 @@ def create_order(db: Session, order_in: schemas.OrderCreate) -> models.Order:
         oi.order_id = order.id
         db.add(oi)
 
+    # Audio de confirmación en segundo plano (misma transacción que el pedido)
+    followups.enqueue_order_speech(db, order)
+    return order
+
+
+def create_order(db: Session, order_in: schemas.OrderCreate) -> models.Order:
+    order = add_order(db, order_in)
     db.commit()
     db.refresh(order)
     return order
 
 
 def get_order(db: Session, order_id: int) -> Optional[models.Order]:
+    """Pedido por id, buscando también en el archivo (ver archive.py)."""
+    order = get_hot_order(db, order_id)
+    if order is None:
+        order = db.query(models.ArchivedOrder).filter(models.ArchivedOrder.id == order_id).first()
+    return order
+
+
+def get_hot_order(db: Session, order_id: int) -> Optional[models.Order]:
+    # Sólo pedidos sin archivar: son los únicos que se pueden modificar
     return db.query(models.Order).filter(models.Order.id == order_id).first()
 
 
 def list_orders_by_customer(db: Session, customer_id: int) -> List[models.Order]:
-    return db.query(models.Order).filter(models.Order.customer_id == customer_id).all()
+    # Los archivados son siempre más antiguos: van primero, como antes de archivar
+    archived = (
+        db.query(models.ArchivedOrder)
+        .options(selectinload(models.ArchivedOrder.items))
+        .filter(models.ArchivedOrder.customer_id == customer_id)
+        .order_by(models.ArchivedOrder.id)
+        .all()
+    )
+    orders = (
+        db.query(models.Order)
+        .options(selectinload(models.Order.items))
+        .filter(models.Order.customer_id == customer_id)
+        .order_by(models.Order.id)
+        .all()
+    )
+    return archived + orders
+
+def encode_order_cursor(value: datetime, order_id: int) -> str:
+    return f"{value.isoformat()}|{order_id}"
+
+
+def decode_order_cursor(cursor: str) -> Tuple[datetime, int]:
+    value, _, order_id = cursor.rpartition("|")
+    return datetime.fromisoformat(value), int(order_id)
+
+
+def list_restaurant_orders(
+    db: Session,
+    restaurant_id: int,
+    statuses: Sequence[str] = models.ACTIVE_ORDER_STATUSES,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[models.Order], Optional[str]]:
+    """
+    Cola de cocina de un restaurante, paginada por keyset.
+
+    Sin `since` devuelve los pedidos con esos estados por orden de llegada
+    (created_at, id), usando el índice parcial de pedidos activos. Con `since`
+    devuelve sólo lo que ha cambiado desde entonces (updated_at > since), en
+    cualquier estado, para que la pantalla pueda quitar los pedidos que han
+    salido de la cola. Devuelve (pedidos, cursor de la página siguiente).
+    """
+    query = (
+        db.query(models.Order)
+        .options(selectinload(models.Order.items))
+        .filter(models.Order.restaurant_id == restaurant_id)
+    )
+    if since is not None:
+        sort_column = models.Order.updated_at
+        query = query.filter(models.Order.updated_at > since)
+    else:
+        sort_column = models.Order.created_at
+        # Estados como literales: SQLite sólo usa el índice parcial si puede
+        # comprobar el WHERE al preparar la consulta, no con parámetros
+        query = query.filter(
+            models.Order.status.in_(bindparam("statuses", list(statuses), expanding=True, literal_execute=True))
+        )
+
+    if cursor:
+        value, last_id = decode_order_cursor(cursor)
+        query = query.filter(
+            or_(sort_column > value, and_(sort_column == value, models.Order.id > last_id))
+        )
+
+    orders = query.order_by(sort_column, models.Order.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        last = orders[-1]
+        next_cursor = encode_order_cursor(
+            last.updated_at if since is not None else last.created_at, last.id
+        )
+    return orders, next_cursor
+
 
 def update_order(
     db: Session,
     order_id: int,
     order_in: schemas.OrderUpdate,
 ) -> Optional[models.Order]:
-    order = get_order(db, order_id)
+    order = get_hot_order(db, order_id)
     if not order:
         return None
 
+    previous_status = order.status
     data = order_in.model_dump(exclude_unset=True)
     for field, value in data.items():
         setattr(order, field, value)
 
+    if order.status != previous_status:
+        followups.enqueue_order_speech(db, order)
+
     db.add(order)
     db.commit()
     db.refresh(order)
@@ -259,6 +418,7 @@ def create_menu_category(db: Session, category_in: schemas.MenuCategoryCreate) -
     db.add(category)
     db.commit()
     db.refresh(category)
+    snapshots.refresh(db, category.restaurant_id, (snapshots.MENU_CATEGORIES,))
     return category
 
 
@@ -289,17 +449,20 @@ def update_menu_category(
     db: Session,
     category_id: int,
     category_in: schemas.MenuCategoryBase,
+    expected_version: Optional[int] = None,
 ) -> Optional[models.MenuCategory]:
     category = get_menu_category(db, category_id)
     if not category:
         return None
+    _check_version(category, expected_version)
 
     if category_in.name is not None:
         category.name = category_in.name
 
     db.add(category)
-    db.commit()
+    _commit_versioned(db)
     db.refresh(category)
+    snapshots.refresh(db, category.restaurant_id, (snapshots.MENU_CATEGORIES,))
     return category
 
 
@@ -308,6 +471,9 @@ def delete_menu_category(db: Session, category_id: int) -> bool:
     if not category:
         return False
 
+    restaurant_id = category.restaurant_id
     db.delete(category)
     db.commit()
+    # Los platos de la categoría se quedan sin category_id
+    snapshots.refresh(db, restaurant_id)
     return True
\ No newline at end of file
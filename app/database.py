@@ -1,5 +1,5 @@
 # app/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
@@ -11,14 +11,55 @@ DEFAULT_SQLITE_URL = "sqlite:///./cartasmart.db"
 
 DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_SQLITE_URL)
 
-# echo=True solo si quieres ver el SQL en consola
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-    pool_pre_ping=True,     # 👈 prueba conexión antes de usarla
-    pool_recycle=1800 
-)
+# Réplicas de sólo lectura opcionales, separadas por comas
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+
+
+def _create_engine(url: str):
+    # echo=True solo si quieres ver el SQL en consola
+    return create_engine(
+        url,
+        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+        pool_pre_ping=True,     # 👈 prueba conexión antes de usarla
+        pool_recycle=1800
+    )
+
+
+def _create_savepoint_engine(url: str):
+    """
+    Engine para transacciones largas con SAVEPOINTs (batch.py, ingest.py).
+
+    pysqlite gestiona las transacciones a su manera y rompe los SAVEPOINT: el
+    RELEASE del primero hace commit. Receta de la documentación de
+    SQLAlchemy: desactivar su BEGIN implícito y emitirlo nosotros. Usamos
+    BEGIN IMMEDIATE para tomar el lock de escritura desde el principio y
+    esperar (busy timeout) en vez de fallar con "database is locked" al
+    subir de lectura a escritura. En otras bases de datos es el engine normal.
+    """
+    if not url.startswith("sqlite"):
+        return engine
+
+    sqlite_engine = _create_engine(url)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(sqlite_engine, "begin")
+    def _on_begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return sqlite_engine
+
+engine = _create_engine(DATABASE_URL)
+savepoint_engine = _create_savepoint_engine(DATABASE_URL)
+replica_engines = [_create_engine(url) for url in DATABASE_REPLICA_URLS]
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SavepointSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=savepoint_engine)
+# Sin bind: deps.get_read_db elige la réplica en cada sesión
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
@@ -1,7 +1,13 @@
 # app/deps.py
-from .database import SessionLocal
+from .database import SessionLocal, ReplicaSessionLocal, replica_engines
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
-from typing import Generator
+from typing import Generator, Optional
+from threading import Lock
+import itertools
+import os
+import time
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -10,3 +16,100 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+# ---------- Réplicas de lectura ----------
+# Tras una escritura, el cliente lee del primario durante esta ventana para ver
+# sus propios cambios aunque las réplicas vayan con retraso.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Tiempo que una réplica que ha fallado queda fuera de rotación
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+LAST_WRITE_COOKIE = "cs_last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class ReplicaPool:
+    """Reparte lecturas entre réplicas (round robin) saltando las caídas."""
+
+    def __init__(self, engines):
+        self.engines = list(engines)
+        self._cycle = itertools.cycle(range(len(self.engines))) if self.engines else None
+        self._down_until = {}
+        self._lock = Lock()
+
+    def pick(self):
+        if not self.engines:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.engines)):
+                engine = self.engines[next(self._cycle)]
+                if self._down_until.get(engine, 0) <= now:
+                    return engine
+        return None
+
+    def mark_down(self, engine) -> None:
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + REPLICA_RETRY_SECONDS
+
+
+replica_pool = ReplicaPool(replica_engines)
+
+
+def _last_write(request: Request) -> Optional[float]:
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def recently_wrote(request: Request) -> bool:
+    last_write = _last_write(request)
+    return last_write is not None and time.time() - last_write < READ_YOUR_WRITES_SECONDS
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Sesión para endpoints de sólo lectura: usa una réplica si hay alguna sana
+    y el cliente no ha escrito hace poco; si no, el primario.
+    """
+    engine = None if recently_wrote(request) else replica_pool.pick()
+    if engine is None:
+        yield from get_db()
+        return
+
+    db = ReplicaSessionLocal(bind=engine)
+    try:
+        db.connection()
+    except DBAPIError:
+        db.close()
+        replica_pool.mark_down(engine)
+        yield from get_db()
+        return
+
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def track_writes(request: Request, call_next):
+    """Middleware: marca al cliente tras una escritura correcta (read-your-writes)."""
+    response = await call_next(request)
+    if replica_pool.engines and request.method in _WRITE_METHODS and response.status_code < 400:
+        now = f"{time.time():.3f}"
+        # El front vive en otro dominio: en https la cookie tiene que ser SameSite=None
+        secure = request.headers.get("x-forwarded-proto", request.url.scheme) == "https"
+        response.headers[LAST_WRITE_HEADER] = now
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            now,
+            max_age=int(READ_YOUR_WRITES_SECONDS) + 1,
+            samesite="none" if secure else "lax",
+            secure=secure,
+        )
+    return response
@@ -0,0 +1,74 @@
+# app/followups.py
+"""
+Trabajos de seguimiento de los pedidos (se ejecutan con jobs.py).
+
+Con ORDER_SPEECH_ENABLED=1, al crear un pedido o cambiar su estado se encola
+la generación del audio de confirmación, que el cliente recoge después con
+`GET /orders/{id}/speech` en vez de llamar a /tts y esperar.
+"""
+import base64
+import os
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from . import jobs, models, voice
+from .admission import speech_admission
+
+ORDER_SPEECH_ENABLED = os.getenv("ORDER_SPEECH_ENABLED", "0") == "1"
+ORDER_SPEECH_JOB = "order.status_speech"
+
+_STATUS_MESSAGES = {
+    "pending": "Hemos recibido tu pedido número {id}",
+    "confirmed": "Tu pedido número {id} está confirmado",
+    "preparing": "Estamos preparando tu pedido número {id}",
+    "delivered": "Tu pedido número {id} ha sido entregado. ¡Que aproveche!",
+    "cancelled": "Tu pedido número {id} ha sido cancelado",
+}
+
+
+def order_ref(order_id: int) -> str:
+    return f"order:{order_id}"
+
+
+def enqueue_order_speech(db: Session, order: models.Order) -> Optional[models.Job]:
+    if not ORDER_SPEECH_ENABLED or order.status not in _STATUS_MESSAGES:
+        return None
+    return jobs.enqueue(
+        db,
+        ORDER_SPEECH_JOB,
+        {"order_id": order.id, "status": order.status},
+        ref=order_ref(order.id),
+        priority=10,
+        max_attempts=3,
+    )
+
+
+def order_speech_text(order: models.Order, status: str) -> str:
+    text = _STATUS_MESSAGES[status].format(id=order.id)
+    if status == "pending":
+        lines = ", ".join(
+            f"{oi.quantity} {oi.menu_item.name}" for oi in order.items if oi.menu_item
+        )
+        total = f"{order.total_amount:.2f}".replace(".", ",")
+        text += f": {lines}. Total {total} euros."
+    return text
+
+
+@jobs.handler(ORDER_SPEECH_JOB)
+def order_status_speech(db: Session, payload: Dict[str, Any]) -> Optional[str]:
+    order = db.query(models.Order).filter(models.Order.id == payload["order_id"]).first()
+    if order is None:
+        return None
+    # Los trabajos corren en el threadpool: mismo límite y breaker que /tts
+    audio = speech_admission.run_sync(voice.synthesize_speech, order_speech_text(order, payload["status"]))
+    return base64.b64encode(audio).decode("utf-8")
+
+
+def latest_order_speech(db: Session, order_id: int) -> Optional[models.Job]:
+    return (
+        db.query(models.Job)
+        .filter(models.Job.ref == order_ref(order_id), models.Job.kind == ORDER_SPEECH_JOB)
+        .order_by(models.Job.id.desc())
+        .first()
+    )
@@ -0,0 +1,168 @@
+# app/ingest.py
+"""
+Modo de ingesta de pedidos con "group commit" para las horas punta.
+
+Con ORDER_INGEST_MODE=group, `POST /orders/` no escribe directamente: deja el
+pedido ya validado por Pydantic en una cola en memoria y espera. Una tarea
+escritora agrupa los pedidos (hasta ORDER_INGEST_MAX_BATCH o cada
+ORDER_INGEST_MAX_WAIT_MS milisegundos) y los inserta todos en una única
+transacción, así que hay un commit/fsync por lote en vez de uno por pedido.
+Cada pedido va en su propio SAVEPOINT: si uno falla (plato no disponible,
+cliente inexistente...) sólo se rechaza ese, y cada petición recibe su
+propio OrderRead cuando su lote ha hecho commit.
+"""
+import asyncio
+import os
+import time
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+
+from . import crud, models, schemas
+from .database import SavepointSessionLocal
+
+ORDER_INGEST_MODE = os.getenv("ORDER_INGEST_MODE", "direct")  # direct | group
+ORDER_INGEST_STOP_TIMEOUT = float(os.getenv("ORDER_INGEST_STOP_TIMEOUT", "30"))
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+_Pending = Tuple[schemas.OrderCreate, asyncio.Future]
+# Marca de fin en la cola: el escritor sale al llegar a ella
+_STOP = None
+_Outcome = Union[schemas.OrderRead, Exception]
+
+
+class OrderIngestor:
+    def __init__(self, max_batch: int, max_wait_ms: float, max_pending: int):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.batches = 0
+        self.orders = 0
+
+    @classmethod
+    def from_env(cls) -> "OrderIngestor":
+        return cls(
+            max_batch=int(os.getenv("ORDER_INGEST_MAX_BATCH", "100")),
+            max_wait_ms=float(os.getenv("ORDER_INGEST_MAX_WAIT_MS", "5")),
+            max_pending=int(os.getenv("ORDER_INGEST_MAX_PENDING", "2000")),
+        )
+
+    @property
+    def running(self) -> bool:
+        # Mientras se para, los pedidos nuevos se escriben directamente
+        return self._task is not None and not self._task.done() and not self._closing
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = ORDER_INGEST_STOP_TIMEOUT) -> None:
+        if self._task is None:
+            return
+        # No admitir más pedidos y dejar que el escritor termine el lote en
+        # curso y los que queden en la cola hasta llegar a la marca de fin.
+        # Sólo se cancela si no acaba en `timeout` segundos.
+        self._closing = True
+        await self._queue.put(_STOP)
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def submit(self, order_in: schemas.OrderCreate) -> schemas.OrderRead:
+        if self._closing:
+            raise IngestQueueFull("Order ingestion is shutting down")
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((order_in, future))
+        except asyncio.QueueFull:
+            raise IngestQueueFull("Too many pending orders")
+        return await future
+
+    async def _collect(self) -> Tuple[List[_Pending], bool]:
+        """Siguiente lote y si se ha llegado a la marca de fin."""
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if pending is _STOP:
+                return batch, True
+            batch.append(pending)
+        return batch, False
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if not batch:
+                continue
+            try:
+                outcomes = await run_in_threadpool(self._write, [order_in for order_in, _ in batch])
+            except Exception as e:
+                # Falló el commit del lote: ningún pedido se ha guardado
+                outcomes = [e] * len(batch)
+
+            for (_, future), outcome in zip(batch, outcomes):
+                if future.done():  # el cliente se ha ido
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+            self.batches += 1
+            self.orders += len(batch)
+
+    def _write(self, orders_in: List[schemas.OrderCreate]) -> List[_Outcome]:
+        db = SavepointSessionLocal()
+        try:
+            outcomes: List[Union[int, Exception]] = []
+            for order_in in orders_in:
+                savepoint = db.begin_nested()
+                try:
+                    order = crud.add_order(db, order_in)
+                    savepoint.commit()
+                    outcomes.append(order.id)
+                except Exception as e:
+                    savepoint.rollback()
+                    outcomes.append(e)
+            db.commit()
+
+            ids = [o for o in outcomes if not isinstance(o, Exception)]
+            orders = {
+                order.id: schemas.OrderRead.model_validate(order)
+                for order in db.query(models.Order)
+                .options(selectinload(models.Order.items))
+                .filter(models.Order.id.in_(ids))
+            } if ids else {}
+            return [o if isinstance(o, Exception) else orders[o] for o in outcomes]
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+order_ingestor = OrderIngestor.from_env()
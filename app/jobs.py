@@ -0,0 +1,209 @@
+# app/jobs.py
+"""
+Cola de trabajos persistente en la propia base de datos, sin broker externo.
+
+`enqueue()` añade el trabajo a la sesión sin hacer commit, así que se guarda
+en la misma transacción que el pedido que lo origina (si el pedido no se
+guarda, el trabajo tampoco). Un worker dentro del proceso (JOB_WORKER_ENABLED)
+reclama trabajos por prioridad y los ejecuta en el threadpool con un límite de
+concurrencia, reintentando con backoff exponencial hasta `max_attempts`.
+
+El reclamo es un UPDATE condicional (`status = 'queued'`), por lo que varios
+workers/procesos pueden compartir la cola sin ejecutar dos veces el mismo
+trabajo; en Postgres además se usa SKIP LOCKED. Los trabajos que se quedan en
+`running` más de JOB_LOCK_TIMEOUT segundos (worker caído) vuelven a la cola.
+"""
+import asyncio
+import json
+import os
+import random
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+from .database import SessionLocal, engine
+
+JOB_WORKER_ENABLED = os.getenv("JOB_WORKER_ENABLED", "0") == "1"
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_LOCK_TIMEOUT = float(os.getenv("JOB_LOCK_TIMEOUT", "300"))
+
+Handler = Callable[[Session, Dict[str, Any]], Optional[str]]
+
+_handlers: Dict[str, Handler] = {}
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    """Registra la función que ejecuta los trabajos de tipo `kind`.
+
+    Recibe (db, payload) y puede devolver un texto que se guarda en `result`.
+    """
+    def register(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    ref: Optional[str] = None,
+    priority: int = 0,
+    max_attempts: int = 5,
+    delay: float = 0,
+) -> models.Job:
+    job = models.Job(
+        kind=kind,
+        ref=ref,
+        payload=json.dumps(payload),
+        priority=priority,
+        max_attempts=max_attempts,
+        run_after=_now() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    return job
+
+
+def claim(db: Session, limit: int) -> List[int]:
+    """Marca como `running` hasta `limit` trabajos listos y devuelve sus ids."""
+    now = _now()
+
+    # Trabajos abandonados por un worker que murió
+    db.query(models.Job).filter(
+        models.Job.status == "running",
+        models.Job.locked_at < now - timedelta(seconds=JOB_LOCK_TIMEOUT),
+    ).update({"status": "queued", "locked_at": None}, synchronize_session=False)
+
+    query = (
+        db.query(models.Job.id)
+        .filter(models.Job.status == "queued", models.Job.run_after <= now)
+        .order_by(models.Job.priority.desc(), models.Job.id)
+        .limit(limit)
+    )
+    if engine.dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+
+    claimed = []
+    for (job_id,) in query.all():
+        updated = (
+            db.query(models.Job)
+            .filter(models.Job.id == job_id, models.Job.status == "queued")
+            .update(
+                {"status": "running", "locked_at": now, "attempts": models.Job.attempts + 1},
+                synchronize_session=False,
+            )
+        )
+        if updated:
+            claimed.append(job_id)
+    db.commit()
+    return claimed
+
+
+def run_job(job_id: int) -> None:
+    db = SessionLocal()
+    try:
+        job = db.query(models.Job).filter(models.Job.id == job_id).first()
+        if job is None:
+            return
+
+        fn = _handlers.get(job.kind)
+        try:
+            if fn is None:
+                raise LookupError(f"No handler for job kind '{job.kind}'")
+            job.result = fn(db, json.loads(job.payload))
+            job.status = "done"
+            job.last_error = None
+        except Exception:
+            db.rollback()
+            job = db.query(models.Job).filter(models.Job.id == job_id).first()
+            job.last_error = traceback.format_exc(limit=5)
+            if job.attempts >= job.max_attempts:
+                job.status = "failed"
+            else:
+                # Backoff exponencial con jitter: ~2s, 4s, 8s...
+                backoff = 2 ** job.attempts * random.uniform(0.5, 1.5)
+                job.status = "queued"
+                job.run_after = _now() + timedelta(seconds=backoff)
+        job.locked_at = None
+        db.commit()
+    finally:
+        db.close()
+
+
+def counts(db: Session) -> Dict[str, int]:
+    rows = db.query(models.Job.status, func.count(models.Job.id)).group_by(models.Job.status).all()
+    return {status: count for status, count in rows}
+
+
+class JobWorker:
+    def __init__(self, concurrency: int, poll_interval: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self.processed = 0
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Dejar terminar lo que ya estaba en marcha
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def _claim(self, limit: int) -> List[int]:
+        db = SessionLocal()
+        try:
+            return claim(db, limit)
+        finally:
+            db.close()
+
+    async def _execute(self, job_id: int) -> None:
+        try:
+            await run_in_threadpool(run_job, job_id)
+        finally:
+            self.processed += 1
+
+    async def _run(self) -> None:
+        while True:
+            free = self.concurrency - len(self._running)
+            job_ids: List[int] = []
+            if free > 0:
+                try:
+                    job_ids = await run_in_threadpool(self._claim, free)
+                except Exception as e:
+                    print("ERROR JOBS:", e)
+
+            for job_id in job_ids:
+                task = asyncio.create_task(self._execute(job_id))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            if not job_ids:
+                if self._running:
+                    await asyncio.wait(self._running, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    await asyncio.sleep(self.poll_interval)
+            elif len(self._running) >= self.concurrency:
+                await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+
+
+job_worker = JobWorker(JOB_WORKER_CONCURRENCY, JOB_POLL_INTERVAL)
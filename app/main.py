@@ -1,13 +1,53 @@
 # app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .database import Base, engine
-from .routers import restaurants, menu_items, customers, orders, menu_categories, transcribe, tts
+from .migrations import upgrade
+from .ingest import ORDER_INGEST_MODE, order_ingestor
+from .jobs import JOB_WORKER_ENABLED, job_worker
+from .deps import track_writes
+from .routers import restaurants, menu_items, customers, orders, menu_categories, transcribe, tts, metrics, batch
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-# Crear tablas en la DB (para entornos pequeños / dev)
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip salvo en las rutas de `exclude_paths`.
+
+    GZipMiddleware acumula el cuerpo comprimido y lo suelta por bloques, así
+    que las respuestas que se envían por partes (NDJSON de la transcripción
+    por trozos) llegarían todas juntas al final.
+    """
+
+    def __init__(self, app, exclude_paths: tuple = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Crear tablas en la DB (para entornos pequeños / dev) y añadir a las que ya
+# existían las columnas e índices nuevos (ver migrations.py)
 Base.metadata.create_all(bind=engine)
+upgrade(engine)
+
 
-app = FastAPI(title="CartaSmart API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if ORDER_INGEST_MODE == "group":
+        await order_ingestor.start()
+    if JOB_WORKER_ENABLED:
+        await job_worker.start()
+    yield
+    await order_ingestor.stop()
+    await job_worker.stop()
+
+
+app = FastAPI(title="CartaSmart API", lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -22,8 +62,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Last-Write", "Retry-After", "ETag", "Last-Modified"],
+)
+
+# Comprime las respuestas grandes; los snapshots de carta ya vienen comprimidos
+# (llevan Content-Encoding) y el middleware los deja pasar tal cual.
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=1000,
+    compresslevel=6,
+    exclude_paths=("/transcribe/chunked",),
 )
 
+# Va por fuera de GZip: sólo toca cabeceras y así GZip ve el cuerpo completo
+app.middleware("http")(track_writes)
+
 
 app.include_router(restaurants.router)
 app.include_router(menu_items.router)
@@ -32,6 +85,8 @@ app.include_router(customers.router)
 app.include_router(orders.router)
 app.include_router(transcribe.router)
 app.include_router(tts.router)
+app.include_router(metrics.router)
+app.include_router(batch.router)
 
 
 
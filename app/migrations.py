@@ -0,0 +1,100 @@
+# app/migrations.py
+"""
+Puesta al día del esquema de bases de datos creadas con versiones anteriores.
+
+`Base.metadata.create_all` crea las tablas que faltan (con sus índices) pero
+no modifica las que ya existen, así que una base antigua se queda sin las
+columnas e índices añadidos después (version/updated_at para los ETag,
+effective_price, los índices de la cola de cocina y del historial del
+cliente...). `upgrade()` compara cada tabla existente con su modelo usando el
+inspector de SQLAlchemy y añade lo que falta:
+
+- columnas: `ALTER TABLE ... ADD COLUMN` con el tipo y el DEFAULT del modelo
+- índices: `CREATE INDEX` tal y como lo define el modelo (también los
+  parciales)
+- datos: effective_price de los platos que no lo tienen (pricing.py)
+
+Es idempotente (en una base al día no hace nada) y se ejecuta al arrancar
+justo después de create_all. Sólo añade: renombrar o borrar columnas sigue
+necesitando una migración a mano.
+"""
+from typing import List
+
+from sqlalchemy import Column, Table, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from . import pricing
+from .database import Base
+
+
+def _add_column_sql(engine: Engine, table: Table, column: Column) -> str:
+    if not column.nullable and column.server_default is None:
+        # Las filas existentes no tendrían valor
+        raise RuntimeError(
+            f"Cannot add NOT NULL column {table.name}.{column.name} without a server_default"
+        )
+    preparer = engine.dialect.identifier_preparer
+    spec = CreateColumn(column).compile(dialect=engine.dialect)
+    return f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {spec}"
+
+
+def _apply(engine: Engine, statement, description: str, still_missing) -> bool:
+    """Ejecuta un cambio en su propia transacción. False si ya lo había hecho otro worker."""
+    try:
+        with engine.begin() as conn:
+            if isinstance(statement, str):
+                conn.exec_driver_sql(statement)
+            else:
+                conn.execute(statement)
+    except SQLAlchemyError:
+        # Varios workers arrancando a la vez: si el otro ya lo ha añadido, bien
+        if still_missing():
+            raise
+        return False
+    print(f"MIGRACIÓN: {description}")
+    return True
+
+
+def upgrade(engine: Engine) -> List[str]:
+    """Añade las columnas e índices de los modelos que faltan en tablas existentes."""
+    applied: List[str] = []
+    existing_tables = set(inspect(engine).get_table_names())
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue  # la crea create_all
+
+        def columns() -> set:
+            return {c["name"] for c in inspect(engine).get_columns(table.name)}
+
+        def indexes() -> set:
+            return {i["name"] for i in inspect(engine).get_indexes(table.name)}
+
+        present = columns()
+        for column in table.columns:
+            if column.name in present:
+                continue
+            description = f"{table.name}.{column.name} añadida"
+            if _apply(engine, _add_column_sql(engine, table, column), description,
+                      lambda name=column.name: name not in columns()):
+                applied.append(description)
+
+        present = indexes()
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name in present:
+                continue
+            description = f"índice {index.name} creado"
+            if _apply(engine, CreateIndex(index), description,
+                      lambda name=index.name: name not in indexes()):
+                applied.append(description)
+
+    if "menu_items" in existing_tables:
+        filled = pricing.backfill_effective_prices(engine)
+        if filled:
+            description = f"effective_price calculado para {filled} platos"
+            print(f"MIGRACIÓN: {description}")
+            applied.append(description)
+
+    return applied
@@ -1,8 +1,17 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, Numeric, DateTime, func
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, Numeric, DateTime, LargeBinary, UniqueConstraint, Index, func
 from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
 from .database import Base
 
+# Pedidos que siguen "vivos" en cocina
+ACTIVE_ORDER_STATUSES = ("pending", "confirmed", "preparing")
+
+
+def utcnow() -> datetime:
+    # Con microsegundos: CURRENT_TIMESTAMP de SQLite sólo llega al segundo
+    return datetime.now(timezone.utc)
+
 
 class Restaurant(Base):
     __tablename__ = "restaurants"
@@ -12,6 +21,11 @@ class Restaurant(Base):
     address = Column(String(255), nullable=True)
     phone = Column(String(50), nullable=True)
     is_active = Column(Boolean, default=True)
+    # Se incrementa en cada UPDATE (ETag / If-Match, ver conditional.py)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+
+    __mapper_args__ = {"version_id_col": version}
 
     categories = relationship("MenuCategory", back_populates="restaurant", cascade="all, delete-orphan")
     menu_items = relationship("MenuItem", back_populates="restaurant")
@@ -24,6 +38,10 @@ class MenuCategory(Base):
     id = Column(Integer, primary_key=True, index=True)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(100), nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+
+    __mapper_args__ = {"version_id_col": version}
 
     restaurant = relationship("Restaurant", back_populates="categories")
     items = relationship("MenuItem", back_populates="category")
@@ -39,9 +57,14 @@ class MenuItem(Base):
     description = Column(Text, nullable=True)
     price = Column(Numeric(10, 2), nullable=False)
     discount = Column(Numeric(5, 2), nullable=True)
+    effective_price = Column(Numeric(10, 2), nullable=True)  # price con discount aplicado (pricing.py)
     image_url = Column(String(500), nullable=True)
 
     is_available = Column(Boolean, default=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+
+    __mapper_args__ = {"version_id_col": version}
 
     restaurant = relationship("Restaurant", back_populates="menu_items")
     category = relationship("MenuCategory", back_populates="items")
@@ -55,6 +78,10 @@ class Customer(Base):
     name = Column(String(150), nullable=False)
     email = Column(String(150), unique=True, index=True, nullable=True)
     phone = Column(String(50), nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+
+    __mapper_args__ = {"version_id_col": version}
 
     orders = relationship("Order", back_populates="customer")
 
@@ -64,12 +91,27 @@ class Order(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
     status = Column(String(50), default="pending")  # pending, confirmed, preparing, delivered, cancelled
     total_amount = Column(Numeric(10, 2), nullable=False, default=0)
     channel = Column(String(50), default="chatbot")  # chatbot, web, etc.
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
+
+    __table_args__ = (
+        # Cola de cocina: índice parcial sólo con los pedidos activos
+        Index(
+            "ix_orders_active_by_restaurant",
+            "restaurant_id", "created_at", "id",
+            postgresql_where=status.in_(ACTIVE_ORDER_STATUSES),
+            sqlite_where=status.in_(ACTIVE_ORDER_STATUSES),
+        ),
+        # Polling incremental (updated_at > since)
+        Index("ix_orders_restaurant_updated", "restaurant_id", "updated_at", "id"),
+        # Sin AUTOINCREMENT SQLite reutiliza los ids más altos borrados, y los
+        # pedidos archivados conservan el suyo (ver archive.py)
+        {"sqlite_autoincrement": True},
+    )
 
     restaurant = relationship("Restaurant", back_populates="orders")
     customer = relationship("Customer", back_populates="orders")
@@ -78,9 +120,10 @@ class Order(Base):
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"))
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), index=True)
     menu_item_id = Column(Integer, ForeignKey("menu_items.id"))
     quantity = Column(Integer, nullable=False, default=1)
     unit_price = Column(Numeric(10, 2), nullable=False)
@@ -88,3 +131,70 @@ class OrderItem(Base):
 
     order = relationship("Order", back_populates="items")
     menu_item = relationship("MenuItem", back_populates="order_items")
+
+
+class MenuSnapshot(Base):
+    """JSON de la carta ya serializado y comprimido (ver snapshots.py)."""
+    __tablename__ = "menu_snapshots"
+    __table_args__ = (UniqueConstraint("restaurant_id", "kind", name="uq_menu_snapshots_restaurant_kind"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(50), nullable=False)  # menu_items, menu_categories
+    etag = Column(String(64), nullable=False)
+    body = Column(LargeBinary, nullable=False)
+    body_gzip = Column(LargeBinary, nullable=False)
+    body_br = Column(LargeBinary, nullable=True)
+    built_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Job(Base):
+    """Trabajo en segundo plano (ver jobs.py)."""
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_ready", "status", "priority", "run_after"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(100), nullable=False)
+    ref = Column(String(100), nullable=True, index=True)  # p.ej. "order:12"
+    payload = Column(Text, nullable=False, default="{}")  # JSON
+    priority = Column(Integer, nullable=False, default=0)  # mayor = antes
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime(timezone=True), nullable=False)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+# ---------- Archivo de pedidos (ver archive.py) ----------
+# Mismas columnas que orders / order_items: archive.py copia las filas con
+# INSERT ... SELECT usando la lista de columnas de la tabla caliente.
+
+class ArchivedOrder(Base):
+    __tablename__ = "orders_archive"
+
+    id = Column(Integer, primary_key=True)
+    restaurant_id = Column(Integer, nullable=False, index=True)
+    customer_id = Column(Integer, nullable=False, index=True)
+    status = Column(String(50))
+    total_amount = Column(Numeric(10, 2), nullable=False, default=0)
+    channel = Column(String(50))
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    items = relationship("ArchivedOrderItem", cascade="all, delete-orphan")
+
+
+class ArchivedOrderItem(Base):
+    __tablename__ = "order_items_archive"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders_archive.id", ondelete="CASCADE"), index=True)
+    menu_item_id = Column(Integer)
+    quantity = Column(Integer, nullable=False, default=1)
+    unit_price = Column(Numeric(10, 2), nullable=False)
+    subtotal = Column(Numeric(10, 2), nullable=False)
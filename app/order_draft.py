@@ -0,0 +1,319 @@
+# app/order_draft.py
+"""
+Convierte una transcripción ("dos margaritas sin cebolla y una coca cola")
+en un borrador de pedido sin llamar a ningún modelo externo.
+
+Para cada restaurante se precalculan firmas de los nombres de la carta:
+trigramas de caracteres del nombre normalizado y de su clave fonética
+(español simplificado: v/b, z/c/s, ll/y, h muda...), con un índice invertido
+trigrama -> platos. Las firmas se cachean por versión de la carta (ver
+search.MenuIndex.version), así que sólo se recalculan cuando cambia el menú.
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .search import menu_index, normalize, stem
+
+MIN_CONFIDENCE = 0.45
+
+# Palabras que separan un plato del siguiente dentro de la frase
+_SEPARATORS = {"y", "e", "mas", "tambien", "ademas", "luego"}
+# A partir de estas palabras lo que sigue son modificadores del plato
+_MODIFIERS = {"sin", "con", "extra", "poco", "poca", "bien", "muy", "aparte"}
+# Relleno típico de un pedido hablado que no aporta al nombre del plato
+_FILLER = {
+    "quiero", "quisiera", "queria", "dame", "deme", "ponme", "pongame", "me",
+    "pon", "pones", "ponga", "pongan", "trae", "traes", "traeme", "traigan",
+    "nos", "por", "favor", "porfa", "pedir", "para", "llevar", "tomar", "de",
+    "el", "la", "los", "las", "lo", "del", "al", "unas", "unos", "yo", "vale",
+    "porfavor", "hola", "buenas", "gracias", "que", "sea", "pues", "eh",
+}
+
+_UNITS = {
+    "un": 1, "uno": 1, "una": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5,
+    "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10, "once": 11,
+    "doce": 12, "trece": 13, "catorce": 14, "quince": 15, "dieciseis": 16,
+    "diecisiete": 17, "dieciocho": 18, "diecinueve": 19, "veinte": 20,
+    "veintiun": 21, "veintiuno": 21, "veintiuna": 21, "veintidos": 22,
+    "veintitres": 23, "veinticuatro": 24, "veinticinco": 25,
+    "veintiseis": 26, "veintisiete": 27, "veintiocho": 28, "veintinueve": 29,
+    "otra": 1, "otro": 1,
+}
+# "media docena" son 6; "media" sola (media ración) cuenta como una unidad
+_HALF = {"media", "medio"}
+_TENS = {
+    "treinta": 30, "cuarenta": 40, "cincuenta": 50, "sesenta": 60,
+    "setenta": 70, "ochenta": 80, "noventa": 90,
+}
+_DOZEN = {"docena": 12, "docenas": 12}
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[,.;]")
+
+
+def phonetic(text: str) -> str:
+    """Clave fonética aproximada para español (entrada ya normalizada)."""
+    s = text
+    s = re.sub(r"ch", "X", s)
+    s = re.sub(r"qu([ei])", r"k\1", s)
+    s = re.sub(r"c([ei])", r"s\1", s)
+    s = re.sub(r"g([ei])", r"j\1", s)
+    s = re.sub(r"gu([ei])", r"g\1", s)
+    s = s.replace("ll", "y").replace("c", "k").replace("q", "k")
+    s = s.replace("z", "s").replace("v", "b").replace("w", "u").replace("h", "")
+    s = re.sub(r"(.)\1+", r"\1", s)  # letras dobles
+    return s
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def parse_quantity(tokens: List[str]) -> Tuple[Optional[int], int]:
+    """
+    Lee una cantidad al principio de `tokens` ("2", "dos", "treinta y dos",
+    "una docena"...). Devuelve (cantidad o None, tokens consumidos).
+    """
+    if not tokens:
+        return None, 0
+
+    first = tokens[0]
+    if first in _HALF:
+        if len(tokens) > 1 and tokens[1] in _DOZEN:
+            return 6, 2
+        if len(tokens) > 2 and tokens[1] == "de" and tokens[2] in _DOZEN:
+            return 6, 3
+        return 1, 1
+    if first.isdigit():
+        value, used = int(first), 1
+    elif first in _UNITS:
+        value, used = _UNITS[first], 1
+    elif first in _TENS:
+        value, used = _TENS[first], 1
+        if len(tokens) >= 3 and tokens[1] == "y" and tokens[2] in _UNITS and _UNITS[tokens[2]] < 10:
+            value += _UNITS[tokens[2]]
+            used = 3
+    else:
+        return None, 0
+
+    if len(tokens) > used and tokens[used] in _DOZEN:
+        value *= 12
+        used += 1
+    elif len(tokens) > used + 1 and tokens[used] == "de" and tokens[used + 1] in _DOZEN:
+        value *= 12
+        used += 2
+    return value, used
+
+
+@dataclass
+class _Entry:
+    item_id: int
+    name: str
+    text: str
+    grams: Set[str]
+    phon_grams: Set[str]
+
+
+class MenuSignatures:
+    """Firmas precalculadas de los nombres de la carta de un restaurante."""
+
+    def __init__(self, version: int, items: List[models.MenuItem]):
+        self.version = version
+        self.entries: Dict[int, _Entry] = {}
+        self._by_gram: Dict[str, List[int]] = defaultdict(list)
+        self._by_phon: Dict[str, List[int]] = defaultdict(list)
+        # Nombres de varias palabras por su primera palabra, de más largo a más
+        # corto: se reconocen enteros antes de buscar cantidades o
+        # modificadores ("tres leches", "arroz con pollo"). Van sin plural
+        # (search.stem) para que "pizzas cuatro quesos" también cuente
+        self.phrases: Dict[str, List[List[str]]] = defaultdict(list)
+        # Finales de nombre que empiezan por un número ("cuatro quesos" de
+        # "pizza cuatro quesos"): detrás de una cantidad ("dos cuatro quesos")
+        # el número es parte del nombre, no otra cantidad
+        self.tails: Dict[str, List[List[str]]] = defaultdict(list)
+
+        for item in items:
+            if not item.is_available:
+                continue
+            text = " ".join(_WORD_RE.findall(normalize(item.name)))
+            entry = _Entry(
+                item_id=item.id,
+                name=item.name,
+                text=text,
+                grams=trigrams(text),
+                phon_grams=trigrams(phonetic(text)),
+            )
+            self.entries[item.id] = entry
+            for gram in entry.grams:
+                self._by_gram[gram].append(item.id)
+            for gram in entry.phon_grams:
+                self._by_phon[gram].append(item.id)
+            words = [stem(word) for word in text.split()]
+            if len(words) > 1:
+                self.phrases[words[0]].append(words)
+            for k, word in enumerate(text.split()[1:-1], start=1):
+                if word in _UNITS or word in _TENS:
+                    self.tails[words[k]].append(words[k:])
+
+        for index in (self.phrases, self.tails):
+            for candidates in index.values():
+                candidates.sort(key=len, reverse=True)
+
+    @staticmethod
+    def _dice(shared: Dict[int, int], query_size: int, size_of) -> Dict[int, float]:
+        return {
+            item_id: 2 * count / (query_size + size_of(item_id))
+            for item_id, count in shared.items()
+        }
+
+    def best_match(self, phrase: str) -> Optional[Tuple[int, float]]:
+        """Plato más parecido a `phrase` y su confianza (0-1)."""
+        if not phrase:
+            return None
+
+        grams = trigrams(phrase)
+        phon_grams = trigrams(phonetic(phrase))
+
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for item_id in self._by_gram.get(gram, ()):
+                shared[item_id] += 1
+        shared_phon: Dict[int, int] = defaultdict(int)
+        for gram in phon_grams:
+            for item_id in self._by_phon.get(gram, ()):
+                shared_phon[item_id] += 1
+
+        raw = self._dice(shared, len(grams), lambda i: len(self.entries[i].grams))
+        phon = self._dice(shared_phon, len(phon_grams), lambda i: len(self.entries[i].phon_grams))
+
+        best: Optional[Tuple[int, float]] = None
+        for item_id in set(raw) | set(phon):
+            score = 0.5 * raw.get(item_id, 0.0) + 0.5 * phon.get(item_id, 0.0)
+            if best is None or score > best[1] or (score == best[1] and item_id < best[0]):
+                best = (item_id, score)
+        return best
+
+
+class SignatureCache:
+    def __init__(self) -> None:
+        self._cache: Dict[int, MenuSignatures] = {}
+        self._lock = Lock()
+
+    def get(self, db: Session, restaurant_id: int) -> MenuSignatures:
+        index = menu_index.get(db, restaurant_id)
+        cached = self._cache.get(restaurant_id)
+        if cached is not None and cached.version == index.version:
+            return cached
+
+        with self._lock:
+            version = index.version
+            items = (
+                db.query(models.MenuItem)
+                .filter(models.MenuItem.restaurant_id == restaurant_id)
+                .all()
+            )
+            signatures = MenuSignatures(version, items)
+            self._cache[restaurant_id] = signatures
+            return signatures
+
+
+signature_cache = SignatureCache()
+
+
+def _menu_phrase(stems: List[str], phrases: Optional[Dict[str, List[List[str]]]]) -> int:
+    """Número de tokens del nombre de plato más largo que empieza aquí (0 si ninguno)."""
+    for words in (phrases or {}).get(stems[0], ()):
+        if stems[:len(words)] == words:
+            return len(words)
+    return 0
+
+
+def _segments(
+    transcript: str,
+    phrases: Optional[Dict[str, List[List[str]]]] = None,
+    tails: Optional[Dict[str, List[List[str]]]] = None,
+) -> List[Tuple[int, str]]:
+    """Parte la frase en (cantidad, texto del plato) por separadores y números."""
+    tokens = _WORD_RE.findall(normalize(transcript))
+    stems = [stem(token) for token in tokens]
+    segments: List[Tuple[int, List[str]]] = []
+    current: Optional[Tuple[int, List[str]]] = None
+    skipping_modifiers = False
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        used = _menu_phrase(stems[i:], phrases)
+        if not used and current is not None and not current[1] and not skipping_modifiers:
+            # Justo detrás de la cantidad: "dos cuatro quesos"
+            used = _menu_phrase(stems[i:], tails)
+        if used:
+            if current is None or skipping_modifiers:
+                current = (1, [])
+                segments.append(current)
+            current[1].extend(tokens[i:i + used])
+            skipping_modifiers = False
+            i += used
+            continue
+
+        quantity, used = parse_quantity(tokens[i:])
+        # Un número justo detrás de un modificador ("con dos huevos") es parte
+        # del modificador; más adelante ("con queso dos cervezas") abre plato
+        if quantity is not None and not (skipping_modifiers and tokens[i - 1] in _MODIFIERS):
+            current = (quantity, [])
+            segments.append(current)
+            skipping_modifiers = False
+            i += used
+            continue
+
+        if token in {",", ".", ";"} or token in _SEPARATORS:
+            current = None
+            skipping_modifiers = False
+        elif token in _MODIFIERS:
+            skipping_modifiers = True
+        elif not skipping_modifiers and token not in _FILLER:
+            if current is None:
+                current = (1, [])
+                segments.append(current)
+            current[1].append(token)
+        i += 1
+
+    return [(qty, " ".join(words)) for qty, words in segments if words]
+
+
+def draft_order(db: Session, draft_in: schemas.OrderDraftRequest) -> schemas.OrderDraftRead:
+    signatures = signature_cache.get(db, draft_in.restaurant_id)
+
+    lines: Dict[int, schemas.OrderDraftItem] = {}
+    unmatched: List[str] = []
+    for quantity, phrase in _segments(draft_in.transcript, signatures.phrases, signatures.tails):
+        match = signatures.best_match(phrase)
+        if match is None or match[1] < MIN_CONFIDENCE:
+            unmatched.append(phrase)
+            continue
+
+        item_id, confidence = match
+        confidence = round(min(confidence, 1.0), 3)
+        if item_id in lines:
+            line = lines[item_id]
+            line.quantity += quantity
+            line.confidence = min(line.confidence, confidence)
+        else:
+            lines[item_id] = schemas.OrderDraftItem(
+                menu_item_id=item_id,
+                name=signatures.entries[item_id].name,
+                quantity=quantity,
+                confidence=confidence,
+            )
+
+    return schemas.OrderDraftRead(
+        restaurant_id=draft_in.restaurant_id,
+        items=list(lines.values()),
+        unmatched=unmatched,
+    )
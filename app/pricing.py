@@ -0,0 +1,99 @@
+# app/pricing.py
+"""
+Cálculo de precios con descuento.
+
+El precio final de un plato (`MenuItem.effective_price`) se guarda ya
+redondeado a 2 decimales, igual que la columna, y se recalcula cada vez que
+cambian `price` o `discount`. Para tarificar un pedido completo se trabaja en
+céntimos enteros en una sola pasada, así el total es siempre exactamente la
+suma de los subtotales de cada línea.
+"""
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Engine
+
+from . import models
+
+CENT = Decimal("0.01")
+
+
+def effective_price(price: Decimal, discount: Optional[Decimal]) -> Decimal:
+    """Precio con el descuento (porcentaje 0-100) aplicado, redondeado a céntimos."""
+    price = Decimal(price)
+    if discount:
+        price = price - (Decimal(discount) / 100) * price
+    return price.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def apply_effective_price(item: models.MenuItem) -> None:
+    item.effective_price = effective_price(item.price, item.discount)
+
+
+def backfill_effective_prices(engine: Engine) -> int:
+    """Calcula effective_price de las filas que no lo tienen (anteriores a la columna)."""
+    table = models.MenuItem.__table__
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(table.c.id, table.c.price, table.c.discount).where(table.c.effective_price.is_(None))
+        ).all()
+        for row in rows:
+            conn.execute(
+                update(table)
+                .where(table.c.id == row.id, table.c.effective_price.is_(None))
+                .values(effective_price=effective_price(row.price, row.discount))
+            )
+    return len(rows)
+
+
+def to_cents(value: Decimal) -> int:
+    return int(Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def unit_cents(item: models.MenuItem) -> int:
+    # Filas antiguas sin effective_price: se calcula al vuelo
+    if item.effective_price is not None:
+        return to_cents(item.effective_price)
+    return to_cents(effective_price(item.price, item.discount))
+
+
+class PricedLine(NamedTuple):
+    menu_item_id: int
+    quantity: int
+    unit_price: Decimal
+    subtotal: Decimal
+
+
+@dataclass
+class PricedOrder:
+    lines: List[PricedLine]
+    total: Decimal
+
+
+def price_order(lines: Sequence[Tuple[models.MenuItem, int]]) -> PricedOrder:
+    """
+    Tarifica [(menu_item, cantidad)] en una sola pasada.
+
+    El precio unitario de cada plato se resuelve una vez por pedido; el total
+    se acumula en céntimos enteros y los subtotales (precio de 2 decimales por
+    entero) son exactos, así que total == suma de subtotales siempre.
+    """
+    units = {}
+    priced = []
+    total_cents = 0
+    for item, quantity in lines:
+        unit = units.get(id(item))
+        if unit is None:
+            cents = unit_cents(item)
+            unit = units[id(item)] = (item.id, cents, from_cents(cents))
+        item_id, cents, unit_price = unit
+        total_cents += cents * quantity
+        priced.append(PricedLine(item_id, quantity, unit_price, unit_price * quantity))
+
+    return PricedOrder(lines=priced, total=from_cents(total_cents))
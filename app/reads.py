@@ -0,0 +1,105 @@
+# app/reads.py
+"""
+Lecturas de listados con SQLAlchemy Core, sin pasar por el ORM.
+
+Para responder a un listado el ORM crea una instancia por fila, la registra
+en la identity map, le instala el seguimiento de cambios y las relaciones, y
+todo eso se tira nada más serializar. Aquí se hace `select()` sobre las
+tablas y se devuelven las filas (`Row`, tuplas ligeras con acceso por
+atributo), que los esquemas de respuesta validan directamente con
+`from_attributes`. Los pedidos se devuelven como dicts con sus líneas ya
+agrupadas.
+
+Sólo lectura: para modificar algo se sigue usando crud con el ORM.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Row, Table, select
+from sqlalchemy.orm import Session
+
+from . import models
+
+_restaurants = models.Restaurant.__table__
+_customers = models.Customer.__table__
+_menu_categories = models.MenuCategory.__table__
+_menu_items = models.MenuItem.__table__
+
+
+def restaurants(db: Session, skip: int = 0, limit: int = 100) -> Sequence[Row]:
+    return db.execute(
+        select(_restaurants).order_by(_restaurants.c.id).offset(skip).limit(limit)
+    ).all()
+
+
+def customers(db: Session, skip: int = 0, limit: int = 100) -> Sequence[Row]:
+    return db.execute(
+        select(_customers).order_by(_customers.c.id).offset(skip).limit(limit)
+    ).all()
+
+
+def menu_categories(db: Session, skip: int = 0, limit: int = 100) -> Sequence[Row]:
+    return db.execute(
+        select(_menu_categories).order_by(_menu_categories.c.id).offset(skip).limit(limit)
+    ).all()
+
+
+def menu_categories_by_restaurant(db: Session, restaurant_id: int) -> Sequence[Row]:
+    return db.execute(
+        select(_menu_categories)
+        .where(_menu_categories.c.restaurant_id == restaurant_id)
+        .order_by(_menu_categories.c.id)
+    ).all()
+
+
+def menu_items_by_restaurant(db: Session, restaurant_id: int) -> Sequence[Row]:
+    return db.execute(
+        select(_menu_items)
+        .where(_menu_items.c.restaurant_id == restaurant_id, _menu_items.c.is_available == True)
+        .order_by(_menu_items.c.id)
+    ).all()
+
+
+def menu_items_by_category(db: Session, category_id: int) -> Sequence[Row]:
+    return db.execute(
+        select(_menu_items)
+        .where(_menu_items.c.category_id == category_id, _menu_items.c.is_available == True)
+        .order_by(_menu_items.c.id)
+    ).all()
+
+
+def _orders_with_items(db: Session, orders: Table, order_items: Table, *criteria: Any) -> List[Dict[str, Any]]:
+    """Pedidos que cumplen `criteria` con sus líneas en "items" (dos consultas)."""
+    rows = [
+        {**row._mapping, "items": []}
+        for row in db.execute(select(orders).where(*criteria).order_by(orders.c.id))
+    ]
+    if not rows:
+        return rows
+
+    by_id = {row["id"]: row for row in rows}
+    items = db.execute(
+        select(order_items)
+        .where(order_items.c.order_id.in_(list(by_id)))
+        .order_by(order_items.c.id)
+    )
+    for item in items:
+        by_id[item.order_id]["items"].append(item)
+    return rows
+
+
+def orders_by_customer(db: Session, customer_id: int) -> List[Dict[str, Any]]:
+    # Como crud.list_orders_by_customer: primero los archivados (más antiguos)
+    archived = models.ArchivedOrder.__table__
+    hot = models.Order.__table__
+    return (
+        _orders_with_items(db, archived, models.ArchivedOrderItem.__table__, archived.c.customer_id == customer_id)
+        + _orders_with_items(db, hot, models.OrderItem.__table__, hot.c.customer_id == customer_id)
+    )
+
+
+def row_version(db: Session, model: Any, row_id: int) -> Optional[Row]:
+    """(version, updated_at) de una fila por clave primaria, sin cargarla."""
+    table = model.__table__
+    return db.execute(
+        select(table.c.version, table.c.updated_at).where(table.c.id == row_id)
+    ).first()
@@ -0,0 +1,16 @@
+# app/routers/batch.py
+from fastapi import APIRouter, HTTPException
+
+from .. import schemas, batch
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+
+@router.post("/", response_model=schemas.BatchResponse)
+def run_batch(batch_in: schemas.BatchRequest):
+    if len(batch_in.operations) > batch.MAX_BATCH_OPERATIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many operations (max {batch.MAX_BATCH_OPERATIONS})",
+        )
+    return batch.execute(batch_in)
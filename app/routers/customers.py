@@ -1,9 +1,9 @@
 # app/routers/customers.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
-from .. import schemas, crud
-from ..deps import get_db
+from .. import schemas, conditional, crud, models, reads
+from ..deps import get_db, get_read_db
 
 router = APIRouter(prefix="/customers", tags=["customers"])
 
@@ -21,20 +21,26 @@ def create_or_get_customer(
 def list_customers(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    customers = crud.get_customers(db, skip=skip, limit=limit)
+    customers = reads.customers(db, skip=skip, limit=limit)
     return customers
 
 
 @router.get("/{customer_id}", response_model=schemas.CustomerRead)
 def get_customer(
     customer_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
 ):
+    cached = conditional.not_modified(request, db, models.Customer, customer_id)
+    if cached is not None:
+        return cached
     customer = crud.get_customer(db, customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
+    conditional.set_headers(response, customer)
     return customer
 
 
@@ -42,11 +48,18 @@ def get_customer(
 def update_customer(
     customer_id: int,
     customer_in: schemas.CustomerUpdate,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    customer = crud.update_customer(db, customer_id, customer_in)
+    expected_version = conditional.expected_version(request, db, models.Customer, customer_id)
+    try:
+        customer = crud.update_customer(db, customer_id, customer_in, expected_version)
+    except crud.VersionConflict:
+        raise conditional.precondition_failed()
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
+    conditional.set_headers(response, customer)
     return customer
 
 
@@ -1,10 +1,10 @@
 # app/routers/menu_categories.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
-from .. import schemas, crud
-from ..deps import get_db
+from .. import schemas, conditional, crud, models, reads, snapshots
+from ..deps import get_db, get_read_db
 
 router = APIRouter(
     prefix="/menu-categories",
@@ -24,29 +24,36 @@ def create_menu_category(
 def list_menu_categories(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    categories = crud.list_menu_categories(db, skip=skip, limit=limit)
+    categories = reads.menu_categories(db, skip=skip, limit=limit)
     return categories
 
 
 @router.get("/by-restaurant/{restaurant_id}", response_model=List[schemas.MenuCategoryRead])
 def list_menu_categories_by_restaurant(
     restaurant_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
 ):
-    categories = crud.list_menu_categories_by_restaurant(db, restaurant_id=restaurant_id)
-    return categories
+    snapshot = snapshots.get(db, restaurant_id, snapshots.MENU_CATEGORIES)
+    return snapshots.response(request, snapshot)
 
 
 @router.get("/{category_id}", response_model=schemas.MenuCategoryRead)
 def get_menu_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
 ):
+    cached = conditional.not_modified(request, db, models.MenuCategory, category_id)
+    if cached is not None:
+        return cached
     category = crud.get_menu_category(db, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Menu category not found")
+    conditional.set_headers(response, category)
     return category
 
 
@@ -54,11 +61,18 @@ def get_menu_category(
 def update_menu_category(
     category_id: int,
     category_in: schemas.MenuCategoryBase,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    category = crud.update_menu_category(db, category_id, category_in)
+    expected_version = conditional.expected_version(request, db, models.MenuCategory, category_id)
+    try:
+        category = crud.update_menu_category(db, category_id, category_in, expected_version)
+    except crud.VersionConflict:
+        raise conditional.precondition_failed()
     if not category:
         raise HTTPException(status_code=404, detail="Menu category not found")
+    conditional.set_headers(response, category)
     return category
 
 
@@ -1,10 +1,10 @@
 # app/routers/menu_items.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
-from .. import schemas, crud
-from ..deps import get_db
+from .. import schemas, conditional, crud, models, reads, snapshots
+from ..deps import get_db, get_read_db
 
 router = APIRouter(prefix="/menu-items", tags=["menu_items"])
 
@@ -21,28 +21,45 @@ def create_menu_item(
 @router.get("/by-restaurant/{restaurant_id}", response_model=List[schemas.MenuItemRead])
 def list_menu_items_by_restaurant(
     restaurant_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
 ):
-    items = crud.get_menu_items_by_restaurant(db, restaurant_id)
-    return items
+    snapshot = snapshots.get(db, restaurant_id, snapshots.MENU_ITEMS)
+    return snapshots.response(request, snapshot)
 
 @router.get("/by-menu_category/{menu_category_id}", response_model=List[schemas.MenuItemRead])
 def list_menu_items_by_menu_category(
     menu_category_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    items = crud.get_menu_items_by_menu_category_id(db, menu_category_id)
+    items = reads.menu_items_by_category(db, menu_category_id)
     return items
 
 
+@router.get("/search", response_model=List[schemas.MenuItemRead])
+def search_menu_items(
+    restaurant_id: int,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    return crud.search_menu_items(db, restaurant_id, q, limit=limit)
+
+
 @router.get("/{menu_item_id}", response_model=schemas.MenuItemRead)
 def get_menu_item(
     menu_item_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
 ):
+    cached = conditional.not_modified(request, db, models.MenuItem, menu_item_id)
+    if cached is not None:
+        return cached
     item = crud.get_menu_item(db, menu_item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Menu item not found")
+    conditional.set_headers(response, item)
     return item
 
 
@@ -50,11 +67,18 @@ def get_menu_item(
 def update_menu_item(
     menu_item_id: int,
     item_in: schemas.MenuItemUpdate,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    item = crud.update_menu_item(db, menu_item_id, item_in)
+    expected_version = conditional.expected_version(request, db, models.MenuItem, menu_item_id)
+    try:
+        item = crud.update_menu_item(db, menu_item_id, item_in, expected_version)
+    except crud.VersionConflict:
+        raise conditional.precondition_failed()
     if not item:
         raise HTTPException(status_code=404, detail="Menu item not found")
+    conditional.set_headers(response, item)
     return item
 
 
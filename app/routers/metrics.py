@@ -0,0 +1,26 @@
+# app/routers/metrics.py
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from .. import jobs
+from ..admission import speech_admission, transcription_admission
+from ..deps import get_db
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/voice")
+def voice_metrics():
+    return {
+        "transcribe": transcription_admission.stats(),
+        "tts": speech_admission.stats(),
+    }
+
+
+@router.get("/jobs")
+def job_metrics(db: Session = Depends(get_db)):
+    return {
+        "by_status": jobs.counts(db),
+        "worker_enabled": jobs.JOB_WORKER_ENABLED,
+        "processed_by_this_worker": jobs.job_worker.processed,
+    }
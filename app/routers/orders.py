@@ -1,30 +1,46 @@
 # app/routers/orders.py
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List
 
-from .. import schemas, crud
-from ..deps import get_db
+from .. import schemas, crud, followups, order_draft, reads
+from ..ingest import IngestQueueFull, order_ingestor
+from ..deps import get_db, get_read_db
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
 @router.post("/", response_model=schemas.OrderRead)
-def create_order(
+async def create_order(
     order_in: schemas.OrderCreate,
     db: Session = Depends(get_db),
 ):
     try:
-        order = crud.create_order(db, order_in)
+        if order_ingestor.running:
+            # Modo group commit (ORDER_INGEST_MODE=group), ver ingest.py
+            order = await order_ingestor.submit(order_in)
+        else:
+            order = await run_in_threadpool(crud.create_order, db, order_in)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except IngestQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     return order
 
 
+@router.post("/draft", response_model=schemas.OrderDraftRead)
+def draft_order(
+    draft_in: schemas.OrderDraftRequest,
+    db: Session = Depends(get_db),
+):
+    return order_draft.draft_order(db, draft_in)
+
+
 @router.get("/{order_id}", response_model=schemas.OrderRead)
 def get_order(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     order = crud.get_order(db, order_id)
     if not order:
@@ -32,12 +48,26 @@ def get_order(
     return order
 
 
+@router.get("/{order_id}/speech")
+def get_order_speech(
+    order_id: int,
+    db: Session = Depends(get_db),
+):
+    job = followups.latest_order_speech(db, order_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Order speech not found")
+    return {
+        "status": job.status,
+        "audio_base64": job.result if job.status == "done" else None,
+    }
+
+
 @router.get("/by-customer/{customer_id}", response_model=List[schemas.OrderRead])
 def list_orders_by_customer(
     customer_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    orders = crud.list_orders_by_customer(db, customer_id)
+    orders = reads.orders_by_customer(db, customer_id)
     return orders
 
 @router.put("/{order_id}", response_model=schemas.OrderRead)
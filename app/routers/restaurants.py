@@ -1,10 +1,11 @@
 # app/routers/restaurants.py
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from .. import schemas, crud
-from ..deps import get_db
+from .. import schemas, conditional, crud, models, reads
+from ..deps import get_db, get_read_db
 
 router = APIRouter(prefix="/restaurants", tags=["restaurants"])
 
@@ -22,31 +23,82 @@ def create_restaurant(
 def list_restaurants(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    restaurants = crud.get_restaurants(db, skip, limit)
+    restaurants = reads.restaurants(db, skip, limit)
     return restaurants
 
 
 @router.get("/{restaurant_id}", response_model=schemas.RestaurantRead)
 def get_restaurant(
     restaurant_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
 ):
+    cached = conditional.not_modified(request, db, models.Restaurant, restaurant_id)
+    if cached is not None:
+        return cached
     restaurant = crud.get_restaurant(db, restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
+    conditional.set_headers(response, restaurant)
     return restaurant
 
+# `next_since` sale del updated_at más reciente que se ha devuelto, no del
+# reloj: la réplica puede ir por detrás y lo que aún no ha llegado tiene un
+# updated_at posterior. El margen cubre transacciones que hacen commit un poco
+# después de fijar su updated_at; el cliente recibirá algún pedido repetido
+# (idempotente).
+KITCHEN_POLL_OVERLAP = timedelta(seconds=2)
+
+
+@router.get("/{restaurant_id}/orders", response_model=schemas.KitchenOrderPage)
+def list_restaurant_orders(
+    restaurant_id: int,
+    status: str = ",".join(models.ACTIVE_ORDER_STATUSES),
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+):
+    statuses = [s.strip() for s in status.split(",") if s.strip()]
+    try:
+        orders, next_cursor = crud.list_restaurant_orders(
+            db,
+            restaurant_id,
+            statuses=statuses,
+            since=since,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    seen = [order.updated_at for order in orders if order.updated_at is not None]
+    return {
+        "orders": orders,
+        "next_cursor": next_cursor,
+        # Sin cambios se repite el mismo `since`
+        "next_since": max(seen) - KITCHEN_POLL_OVERLAP if seen else since,
+    }
+
+
 @router.put("/{restaurant_id}", response_model=schemas.RestaurantRead)
 def update_restaurant(
     restaurant_id: int,
     restaurant_in: schemas.RestaurantUpdate,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
 ):
-    restaurant = crud.update_restaurant(db, restaurant_id, restaurant_in)
+    expected_version = conditional.expected_version(request, db, models.Restaurant, restaurant_id)
+    try:
+        restaurant = crud.update_restaurant(db, restaurant_id, restaurant_in, expected_version)
+    except crud.VersionConflict:
+        raise conditional.precondition_failed()
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
+    conditional.set_headers(response, restaurant)
     return restaurant
 
 
@@ -1,23 +1,90 @@
+import json
+from contextlib import aclosing
+
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from openai import OpenAI
-import os
+from fastapi.responses import StreamingResponse
+
+from .. import transcription, voice
+from ..admission import AdmissionError, to_http_exception, transcription_admission
 
 router = APIRouter(prefix="/transcribe", tags=["transcription"])
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 @router.post("/")
 async def transcribe_audio(file: UploadFile = File(...)):
+    audio_bytes = await file.read()
+
+    try:
+        text = await transcription_admission.run(
+            voice.transcribe_bytes,
+            file.filename or "audio.webm",
+            audio_bytes,
+            file.content_type,
+        )
+    except AdmissionError as e:
+        raise to_http_exception(e)
+    except Exception as e:
+        print("ERROR:", e)
+        raise HTTPException(status_code=502, detail="Transcription service error")
+
+    return {"text": text}
+
+
+@router.post("/chunked")
+async def transcribe_audio_chunked(file: UploadFile = File(...), stream: bool = False):
+    """
+    Transcribe grabaciones largas (WAV o PCM `audio/L16; rate=...`) por trozos
+    en paralelo (ver transcription.py).
+
+    Con `stream=true` responde NDJSON: una línea por trozo según termina
+    ({"index", "start", "end", "text"} o {"index", ..., "error"}) y una final
+    {"done": true, "text", "failed"} con el texto completo en orden.
+    """
+    audio_bytes = await file.read()
+    filename = file.filename or "audio.wav"
     try:
-        audio_bytes = await file.read()
+        chunks = transcription.split_audio(audio_bytes, file.content_type)
+    except transcription.UnsupportedAudio as e:
+        raise HTTPException(status_code=415, detail=str(e))
 
-        response = client.audio.transcriptions.create(
-            file=(file.filename or "audio.webm", audio_bytes, file.content_type),
-            model="gpt-4o-transcribe",
+    if stream:
+        return StreamingResponse(
+            _stream_chunks(chunks, filename),
+            media_type="application/x-ndjson",
+            # Cada línea sale en cuanto su trozo está listo (esta ruta no
+            # pasa por GZip, ver main.py)
+            headers={"Cache-Control": "no-cache"},
         )
 
-        return {"text": response.text}
+    texts = [""] * len(chunks)
+    async with aclosing(transcription.transcribe_chunks(chunks, filename)) as results:
+        async for chunk, result in results:
+            if isinstance(result, AdmissionError):
+                raise to_http_exception(result)
+            if isinstance(result, Exception):
+                print("ERROR:", result)
+                raise HTTPException(status_code=502, detail="Transcription service error")
+            texts[chunk.index] = result
 
-    except Exception as e:
-        print("ERROR:", e)
-        raise HTTPException(status_code=500, detail=str(e))
+    return {"text": transcription.join_texts(texts), "chunks": len(chunks)}
+
+
+async def _stream_chunks(chunks, filename: str):
+    texts = [""] * len(chunks)
+    failed = []
+    async with aclosing(transcription.transcribe_chunks(chunks, filename)) as results:
+        async for chunk, result in results:
+            line = {"index": chunk.index, "start": chunk.start, "end": chunk.end}
+            if isinstance(result, Exception):
+                print("ERROR:", result)
+                failed.append(chunk.index)
+                line["error"] = str(result) if isinstance(result, AdmissionError) else "Transcription service error"
+            else:
+                texts[chunk.index] = result
+                line["text"] = result
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    yield json.dumps(
+        {"done": True, "text": transcription.join_texts(texts), "failed": sorted(failed)},
+        ensure_ascii=False,
+    ) + "\n"
@@ -1,35 +1,27 @@
 from fastapi import APIRouter, HTTPException
-from openai import OpenAI
 import base64
-import os
+
+from .. import voice
+from ..admission import AdmissionError, speech_admission, to_http_exception
 
 router = APIRouter(prefix="/tts", tags=["tts"])
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 @router.post("/")
 async def text_to_speech(payload: dict):
-    try:
-        text = payload.get("text", "")
-        if not text:
-            raise HTTPException(status_code=400, detail="Missing text")
-
-        # Llamada TTS → devuelve HttpxBinaryResponseContent
-        response = client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            input=text,
-            voice="verse",
-            response_format="mp3",
-        )
-
-        # EXTRAER BYTES CORRECTAMENTE
-        audio_bytes = response.read()   # 🔥 ESTE ES EL PUNTO CLAVE
-
-        # Convertir a base64
-        audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
-
-        return {"audio_base64": audio_b64}
+    text = payload.get("text", "")
+    if not text:
+        raise HTTPException(status_code=400, detail="Missing text")
 
+    try:
+        audio_bytes = await speech_admission.run(voice.synthesize_speech, text)
+    except AdmissionError as e:
+        raise to_http_exception(e)
     except Exception as e:
         print("ERROR TTS:", e)
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=502, detail="Text-to-speech service error")
+
+    # Convertir a base64
+    audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
+
+    return {"audio_base64": audio_b64}
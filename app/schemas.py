@@ -1,5 +1,5 @@
 # app/schemas.py
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import datetime
@@ -82,6 +82,7 @@ class MenuItemRead(MenuItemBase):
     id: int
     restaurant_id: int
     category_id: Optional[int]
+    effective_price: Optional[Decimal] = None
 
     class Config:
         from_attributes = True
@@ -151,3 +152,55 @@ class OrderRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class KitchenOrderPage(BaseModel):
+    orders: List[OrderRead]
+    next_cursor: Optional[str] = None   # siguiente página (keyset)
+    next_since: Optional[datetime] = None  # valor de `since` para el siguiente sondeo
+
+
+# ---------- Order draft ----------
+class OrderDraftRequest(BaseModel):
+    restaurant_id: int
+    transcript: str = Field(..., min_length=1)
+
+
+class OrderDraftItem(BaseModel):
+    menu_item_id: int
+    name: str
+    quantity: int
+    confidence: float = Field(..., ge=0, le=1)
+
+
+class OrderDraftRead(BaseModel):
+    restaurant_id: int
+    items: List[OrderDraftItem] = []
+    unmatched: List[str] = []
+
+
+# ---------- Batch ----------
+class BatchOperation(BaseModel):
+    op: str                             # p.ej. "customer.get_or_create", "order.create"
+    args: Dict[str, Any] = {}           # admite referencias "$<id o posición>.<campo>"
+    id: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1)
+    atomic: bool = True                 # False: cada operación falla por separado
+
+
+class BatchOperationResult(BaseModel):
+    id: Optional[str] = None
+    op: str
+    status: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    elapsed_ms: float = 0
+
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: List[BatchOperationResult]
+    elapsed_ms: float
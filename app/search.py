@@ -0,0 +1,264 @@
+# app/search.py
+"""
+Índice invertido en memoria para buscar platos de la carta por texto.
+
+Cada restaurante tiene su propio índice, que se construye la primera vez que
+se consulta y después se mantiene de forma incremental desde crud cuando se
+crea, modifica o borra un MenuItem. La normalización ignora mayúsculas y
+acentos ("Piña" == "pina") y aplica un stemming mínimo de plurales, de modo
+que "margaritas" encuentra "Margarita".
+
+Nota: el índice vive en el proceso. Con varios workers, cada uno mantiene el
+suyo y sólo ve al instante las mutaciones que pasan por él mismo. Para recoger
+las del resto, como mucho cada MENU_INDEX_CHECK_SECONDS se compara una firma
+de la carta en la base de datos (número de platos, id máximo y suma de
+`version`) y si ha cambiado se reconstruye el índice.
+"""
+import itertools
+import math
+import os
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import models
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los",
+    "para", "por", "sin", "un", "una", "unas", "uno", "unos", "y",
+}
+
+# Contador global: cada mutación de cualquier índice obtiene una versión nueva,
+# así quien cachee datos derivados de la carta puede detectar cambios aunque
+# el índice se haya reconstruido desde cero.
+_versions = itertools.count(1)
+
+MENU_INDEX_CHECK_SECONDS = float(os.getenv("MENU_INDEX_CHECK_SECONDS", "1"))
+
+NAME_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+PREFIX_FACTOR = 0.5
+
+
+def normalize(text: str) -> str:
+    """Minúsculas y sin acentos/diacríticos (la ñ pasa a n)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def stem(token: str) -> str:
+    # Plurales regulares: "tacos" -> "taco", "margaritas" -> "margarita"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: Optional[str], keep_stopwords: bool = False) -> List[str]:
+    if not text:
+        return []
+    tokens = _TOKEN_RE.findall(normalize(text))
+    if not keep_stopwords:
+        tokens = [t for t in tokens if t not in STOPWORDS]
+    return [stem(t) for t in tokens]
+
+
+class MenuIndex:
+    """Índice de un único restaurante: término -> {menu_item_id: peso}."""
+
+    def __init__(self, restaurant_id: int):
+        self.restaurant_id = restaurant_id
+        self.version = next(_versions)
+        self.stamp: Optional[Tuple] = None  # firma de la carta al construirlo
+        self.checked_at = 0.0
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._item_terms: Dict[int, Dict[str, float]] = {}
+        self._item_versions: Dict[int, int] = {}
+        self._available: Set[int] = set()
+        self._sorted_terms: List[str] = []
+        self._terms_dirty = False
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._item_terms)
+
+    @staticmethod
+    def _weights(item: models.MenuItem) -> Dict[str, float]:
+        weights: Dict[str, float] = defaultdict(float)
+        for token in tokenize(item.name):
+            weights[token] += NAME_WEIGHT
+        for token in tokenize(item.description):
+            weights[token] += DESCRIPTION_WEIGHT
+        return weights
+
+    def _remove_unlocked(self, item_id: int) -> None:
+        for term in self._item_terms.pop(item_id, {}):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(item_id, None)
+            if not posting:
+                del self._postings[term]
+                self._terms_dirty = True
+        self._item_versions.pop(item_id, None)
+        self._available.discard(item_id)
+
+    def upsert(self, item: models.MenuItem) -> None:
+        weights = self._weights(item)
+        with self._lock:
+            self._remove_unlocked(item.id)
+            for term, weight in weights.items():
+                if term not in self._postings:
+                    self._terms_dirty = True
+                self._postings[term][item.id] = weight
+            self._item_terms[item.id] = weights
+            self._item_versions[item.id] = item.version
+            if item.is_available:
+                self._available.add(item.id)
+            self.version = next(_versions)
+
+    def remove(self, item_id: int) -> None:
+        with self._lock:
+            self._remove_unlocked(item_id)
+            self.version = next(_versions)
+
+    def local_stamp(self) -> Tuple:
+        """La firma de MenuIndexRegistry._stamp calculada con lo que hay en el índice."""
+        with self._lock:
+            if not self._item_versions:
+                return (0, None, None)
+            return (
+                len(self._item_versions),
+                max(self._item_versions),
+                sum(self._item_versions.values()),
+            )
+
+    def _terms_with_prefix(self, prefix: str) -> Iterable[str]:
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+        start = bisect_left(self._sorted_terms, prefix)
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[int, float]]:
+        """
+        Devuelve [(menu_item_id, score)] ordenado por relevancia.
+
+        Cada término de la consulta puntúa por coincidencia exacta; si no
+        existe tal cual en la carta se expande por prefijo con menos peso
+        (útil mientras el usuario escribe o cuando la transcripción corta una
+        palabra). El peso se multiplica por un idf para que las palabras raras
+        de la carta pesen más que las comunes.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            total = len(self._item_terms) or 1
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms:
+                candidates = [term] if term in self._postings else self._terms_with_prefix(term)
+                for candidate in candidates:
+                    posting = self._postings[candidate]
+                    idf = math.log(1 + total / len(posting))
+                    factor = 1.0 if candidate == term else PREFIX_FACTOR
+                    for item_id, weight in posting.items():
+                        if item_id in self._available:
+                            scores[item_id] += weight * idf * factor
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:limit]
+
+
+class MenuIndexRegistry:
+    """Índices por restaurante, construidos bajo demanda."""
+
+    def __init__(self) -> None:
+        self._indexes: Dict[int, MenuIndex] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _stamp(db: Session, restaurant_id: int) -> Tuple:
+        # Cambia con cualquier alta, baja o UPDATE (version_id_col) de un plato
+        return tuple(
+            db.query(
+                func.count(models.MenuItem.id),
+                func.max(models.MenuItem.id),
+                func.sum(models.MenuItem.version),
+            )
+            .filter(models.MenuItem.restaurant_id == restaurant_id)
+            .one()
+        )
+
+    def get(self, db: Session, restaurant_id: int) -> MenuIndex:
+        index = self._indexes.get(restaurant_id)
+        now = time.monotonic()
+        if index is not None and now - index.checked_at < MENU_INDEX_CHECK_SECONDS:
+            return index
+
+        stamp = self._stamp(db, restaurant_id)
+        with self._lock:
+            index = self._indexes.get(restaurant_id)
+            if index is not None and index.stamp == stamp:
+                index.checked_at = now
+                return index
+
+            index = MenuIndex(restaurant_id)
+            items = (
+                db.query(models.MenuItem)
+                .filter(models.MenuItem.restaurant_id == restaurant_id)
+                .all()
+            )
+            for item in items:
+                index.upsert(item)
+            index.stamp = stamp
+            index.checked_at = now
+            self._indexes[restaurant_id] = index
+            return index
+
+    def peek(self, restaurant_id: int) -> Optional[MenuIndex]:
+        return self._indexes.get(restaurant_id)
+
+    def item_changed(self, item: models.MenuItem) -> None:
+        # Si el índice aún no existe no hace falta hacer nada: se construirá
+        # completo en la primera búsqueda.
+        index = self._indexes.get(item.restaurant_id)
+        if index is not None:
+            index.upsert(item)
+            self._restamp(index)
+
+    def item_removed(self, item_id: int, restaurant_id: int) -> None:
+        index = self._indexes.get(restaurant_id)
+        if index is not None:
+            index.remove(item_id)
+            self._restamp(index)
+
+    def _restamp(self, index: MenuIndex) -> None:
+        # El cambio local ya está en el índice: sin esto la siguiente
+        # comprobación vería otra firma y lo reconstruiría entero. Si otro
+        # worker también ha tocado la carta la firma seguirá sin coincidir.
+        with self._lock:
+            if index.stamp is not None:
+                index.stamp = index.local_stamp()
+
+    def invalidate(self, restaurant_id: Optional[int] = None) -> None:
+        with self._lock:
+            if restaurant_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(restaurant_id, None)
+
+
+menu_index = MenuIndexRegistry()
@@ -0,0 +1,369 @@
+# app/seed.py
+"""
+Generador de datos sintéticos para pruebas de escala.
+
+    python -m app.seed --orders 1000000 --customers 200000 --restaurants 200
+
+Crea restaurantes, categorías, platos, clientes, pedidos y líneas de pedido
+con distribuciones parecidas a las reales: unos pocos restaurantes y platos
+concentran la mayoría de pedidos (Zipf), hay picos a la hora de comer y de
+cenar y más pedidos los fines de semana, y sólo los pedidos de la última hora
+siguen activos en cocina. Con la misma semilla y los mismos parámetros el
+resultado es idéntico (las fechas son relativas a --end).
+
+Escribe directamente con la conexión DBAPI, por bloques y sin pasar por el
+ORM: COPY en Postgres y executemany en SQLite. Los ids se asignan aquí (a
+partir del máximo existente) para poder enlazar las líneas con sus pedidos
+sin RETURNING, así que se puede lanzar sobre una base de datos con datos.
+Los snapshots de carta y el índice de búsqueda se generan solos en la
+primera lectura.
+"""
+import argparse
+import bisect
+import csv
+import io
+import itertools
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import migrations, models, pricing
+from .database import Base, engine
+
+# Carta de ejemplo: categoría -> (platos, rango de precio en euros)
+MENU: Dict[str, Tuple[Sequence[str], Tuple[float, float]]] = {
+    "Entrantes": (("Croquetas de jamón", "Patatas bravas", "Gazpacho", "Salmorejo", "Pimientos de padrón",
+                   "Calamares a la romana", "Tortilla de patatas", "Ensaladilla rusa", "Pan con tomate"), (4, 12)),
+    "Ensaladas": (("Ensalada mixta", "Ensalada César", "Ensalada de queso de cabra", "Ensalada caprese",
+                   "Ensalada de pasta"), (7, 13)),
+    "Principales": (("Paella valenciana", "Arroz negro", "Fideuá", "Secreto ibérico", "Entrecot",
+                     "Merluza a la vasca", "Bacalao al pil pil", "Pollo al ajillo", "Albóndigas en salsa",
+                     "Lasaña de carne", "Risotto de setas"), (10, 24)),
+    "Pizzas": (("Pizza margarita", "Pizza barbacoa", "Pizza cuatro quesos", "Pizza prosciutto",
+                "Pizza vegetal", "Pizza carbonara"), (8, 15)),
+    "Hamburguesas": (("Hamburguesa clásica", "Hamburguesa con queso", "Hamburguesa de pollo",
+                      "Hamburguesa vegana", "Hamburguesa doble"), (9, 16)),
+    "Postres": (("Tarta de queso", "Flan casero", "Natillas", "Arroz con leche", "Coulant de chocolate",
+                 "Helado", "Tiramisú"), (3.5, 7)),
+    "Bebidas": (("Agua mineral", "Refresco de cola", "Cerveza", "Copa de vino tinto", "Zumo de naranja",
+                 "Café solo", "Café con leche", "Limonada"), (1.5, 4.5)),
+}
+VARIANTS = ("", " de la casa", " especial", " grande", " para compartir")
+
+FIRST_NAMES = ("Ana", "Luis", "María", "Javier", "Lucía", "Carlos", "Elena", "Pablo", "Sara", "Diego",
+               "Marta", "Jorge", "Laura", "Andrés", "Paula", "Miguel", "Carmen", "Raúl", "Irene", "Hugo")
+LAST_NAMES = ("García", "Martínez", "López", "Sánchez", "Pérez", "Gómez", "Martín", "Jiménez", "Ruiz",
+              "Hernández", "Díaz", "Moreno", "Álvarez", "Romero", "Navarro", "Torres", "Molina")
+STREETS = ("Calle Mayor", "Avenida de la Constitución", "Calle Real", "Plaza de España", "Calle del Sol",
+           "Paseo del Prado", "Calle de Alcalá", "Rambla Nova")
+
+# Peso relativo de cada hora del día (0-23) y de cada día de la semana (lunes=0)
+HOUR_WEIGHTS = (1, 0.5, 0.2, 0.1, 0.1, 0.1, 0.2, 0.5, 1, 1.5, 2, 3, 6, 12, 14, 9, 3, 2, 3, 5, 11, 14, 10, 4)
+WEEKDAY_WEIGHTS = (0.8, 0.8, 0.9, 1.0, 1.3, 1.5, 1.2)
+
+CHANNELS = (("chatbot", 0.6), ("web", 0.4))
+
+
+def _zipf_cum_weights(n: int, s: float) -> List[float]:
+    return list(itertools.accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def _pick(rng: random.Random, cum_weights: List[float]) -> int:
+    """Índice aleatorio según pesos acumulados (como random.choices, sin listas)."""
+    return bisect.bisect_right(cum_weights, rng.random() * cum_weights[-1])
+
+
+def _money(cents: int) -> str:
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+# ---------- Escritura en bloque ----------
+
+class BulkWriter:
+    """Inserta filas (tuplas) con la vía más rápida del dialecto."""
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.dialect = engine.dialect.name
+        self.rows_written: Dict[str, int] = {}
+        self._conn = engine.raw_connection()
+        if self.dialect == "sqlite":
+            cursor = self._conn.cursor()
+            # Sólo para esta conexión: si se va la luz a mitad, se vuelve a sembrar
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.close()
+
+    def next_id(self, table: str) -> int:
+        cursor = self._conn.cursor()
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+        (max_id,) = cursor.fetchone()
+        cursor.close()
+        return max_id + 1
+
+    def _format(self, value: Any) -> Any:
+        if isinstance(value, datetime) and self.dialect == "sqlite":
+            # Mismo formato que guarda SQLAlchemy (sin zona), para que las
+            # comparaciones de texto de SQLite funcionen
+            return value.replace(tzinfo=None).isoformat(" ", "microseconds")
+        return value
+
+    def write(self, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+        if not rows:
+            return
+        cursor = self._conn.cursor()
+        try:
+            if self.dialect == "postgresql":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+                )
+            else:
+                if self.dialect == "sqlite":
+                    rows = [tuple(self._format(v) for v in row) for row in rows]
+                placeholders = ", ".join(["?" if self.dialect == "sqlite" else "%s"] * len(columns))
+                cursor.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+                )
+        finally:
+            cursor.close()
+        self.rows_written[table] = self.rows_written.get(table, 0) + len(rows)
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        if self.dialect == "postgresql":
+            # Los ids se han puesto a mano: avanzar las secuencias
+            cursor = self._conn.cursor()
+            for table in self.rows_written:
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                )
+            cursor.close()
+            self._conn.commit()
+        self._conn.close()
+
+
+# ---------- Generación ----------
+
+class _Restaurant:
+    __slots__ = ("id", "item_ids", "item_cents", "item_cum_weights")
+
+    def __init__(self, restaurant_id: int):
+        self.id = restaurant_id
+        self.item_ids: List[int] = []
+        self.item_cents: List[int] = []
+        self.item_cum_weights: List[float] = []
+
+
+def seed_catalog(
+    writer: BulkWriter, rng: random.Random, restaurants: int
+) -> List[_Restaurant]:
+    restaurant_id = writer.next_id("restaurants")
+    category_id = writer.next_id("menu_categories")
+    item_id = writer.next_id("menu_items")
+
+    restaurant_rows, category_rows, item_rows = [], [], []
+    catalog = []
+    for n in range(restaurants):
+        restaurant = _Restaurant(restaurant_id)
+        restaurant_rows.append((
+            restaurant_id,
+            f"{rng.choice(('Casa', 'Bar', 'Restaurante', 'Taberna', 'Mesón'))} {rng.choice(LAST_NAMES)} {n + 1}",
+            f"{rng.choice(STREETS)}, {rng.randint(1, 200)}",
+            f"9{rng.randint(10000000, 99999999)}",
+            True,
+        ))
+
+        categories = rng.sample(sorted(MENU), rng.randint(4, len(MENU)))
+        for category in categories:
+            category_rows.append((category_id, restaurant_id, category))
+            dishes, (low, high) = MENU[category]
+            names = [dish + variant for dish in dishes for variant in VARIANTS]
+            for name in rng.sample(names, rng.randint(4, min(12, len(names)))):
+                price = Decimal(str(round(rng.uniform(low, high) * 2) / 2)).quantize(pricing.CENT)
+                discount = Decimal(rng.choice((5, 10, 15, 20))) if rng.random() < 0.1 else None
+                effective = pricing.effective_price(price, discount)
+                item_rows.append((
+                    item_id, restaurant_id, category_id, name, f"{name} elaborado al momento.",
+                    str(price), str(discount) if discount is not None else None, str(effective),
+                    None, rng.random() < 0.95,
+                ))
+                restaurant.item_ids.append(item_id)
+                restaurant.item_cents.append(pricing.to_cents(effective))
+                item_id += 1
+            category_id += 1
+
+        # Unos pocos platos concentran la mayoría de pedidos, y no son
+        # siempre los primeros de la carta
+        weights = [1 / (rank ** 1.1) for rank in range(1, len(restaurant.item_ids) + 1)]
+        rng.shuffle(weights)
+        restaurant.item_cum_weights = list(itertools.accumulate(weights))
+        catalog.append(restaurant)
+        restaurant_id += 1
+
+    writer.write("restaurants", ("id", "name", "address", "phone", "is_active"), restaurant_rows)
+    writer.write("menu_categories", ("id", "restaurant_id", "name"), category_rows)
+    writer.write(
+        "menu_items",
+        ("id", "restaurant_id", "category_id", "name", "description", "price", "discount",
+         "effective_price", "image_url", "is_available"),
+        item_rows,
+    )
+    writer.commit()
+    return catalog
+
+
+def seed_customers(writer: BulkWriter, rng: random.Random, customers: int) -> Tuple[int, int]:
+    first_id = customer_id = writer.next_id("customers")
+    columns = ("id", "name", "email", "phone")
+    rows = []
+    for _ in range(customers):
+        rows.append((
+            customer_id,
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            f"cliente{customer_id}@seed.cartasmart.test",
+            f"6{rng.randint(10000000, 99999999)}",
+        ))
+        customer_id += 1
+        if len(rows) >= writer.chunk_size:
+            writer.write("customers", columns, rows)
+            writer.commit()
+            rows = []
+    writer.write("customers", columns, rows)
+    writer.commit()
+    return first_id, customer_id - first_id
+
+
+def _order_times(rng: random.Random, end: datetime, days: int) -> Callable[[], datetime]:
+    start = end - timedelta(days=days)
+    day_cum = list(itertools.accumulate(
+        WEEKDAY_WEIGHTS[(start + timedelta(days=d)).weekday()] for d in range(days)
+    ))
+    hour_cum = list(itertools.accumulate(HOUR_WEIGHTS))
+
+    def order_time() -> datetime:
+        day = _pick(rng, day_cum)
+        hour = _pick(rng, hour_cum)
+        return start + timedelta(days=day, hours=hour, seconds=rng.random() * 3600)
+
+    return order_time
+
+
+def _status(rng: random.Random, age: timedelta) -> Tuple[str, timedelta]:
+    """Estado según la antigüedad del pedido y cuánto después se actualizó."""
+    if age < timedelta(minutes=15):
+        return "pending", timedelta(0)
+    if age < timedelta(minutes=60):
+        status = rng.choice(models.ACTIVE_ORDER_STATUSES)
+        return status, timedelta(minutes=rng.uniform(0, 10))
+    status = "cancelled" if rng.random() < 0.07 else "delivered"
+    return status, timedelta(minutes=rng.uniform(15, 60))
+
+
+def seed_orders(
+    writer: BulkWriter,
+    rng: random.Random,
+    catalog: List[_Restaurant],
+    customers: Tuple[int, int],
+    orders: int,
+    end: datetime,
+    days: int,
+    progress: Optional[Callable[[int], None]] = None,
+) -> None:
+    first_customer, customer_count = customers
+    restaurant_cum = _zipf_cum_weights(len(catalog), 0.8)
+    # Clientes habituales frente a clientes de un solo pedido
+    customer_cum = _zipf_cum_weights(customer_count, 0.6)
+    order_time = _order_times(rng, end, days)
+    channel_cum = list(itertools.accumulate(weight for _, weight in CHANNELS))
+
+    order_id = writer.next_id("orders")
+    order_item_id = writer.next_id("order_items")
+    order_columns = ("id", "restaurant_id", "customer_id", "status", "total_amount", "channel",
+                     "created_at", "updated_at")
+    item_columns = ("id", "order_id", "menu_item_id", "quantity", "unit_price", "subtotal")
+
+    order_rows: List[tuple] = []
+    item_rows: List[tuple] = []
+    for n in range(1, orders + 1):
+        restaurant = catalog[_pick(rng, restaurant_cum)]
+        created_at = order_time()
+        status, updated_after = _status(rng, end - created_at)
+
+        total = 0
+        lines = 1 + min(int(rng.expovariate(0.6)), 7)
+        for _ in range(lines):
+            index = _pick(rng, restaurant.item_cum_weights)
+            quantity = 1 if rng.random() < 0.8 else rng.randint(2, 4)
+            unit = restaurant.item_cents[index]
+            total += unit * quantity
+            item_rows.append((
+                order_item_id, order_id, restaurant.item_ids[index], quantity,
+                _money(unit), _money(unit * quantity),
+            ))
+            order_item_id += 1
+
+        order_rows.append((
+            order_id, restaurant.id, first_customer + _pick(rng, customer_cum), status, _money(total),
+            CHANNELS[_pick(rng, channel_cum)][0], created_at, created_at + updated_after,
+        ))
+        order_id += 1
+
+        if len(order_rows) >= writer.chunk_size or n == orders:
+            writer.write("orders", order_columns, order_rows)
+            writer.write("order_items", item_columns, item_rows)
+            writer.commit()
+            order_rows, item_rows = [], []
+            if progress:
+                progress(n)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de CartaSmart.")
+    parser.add_argument("--restaurants", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=20000)
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=90, help="días de histórico de pedidos")
+    parser.add_argument("--end", type=date.fromisoformat, default=None,
+                        help="fecha (YYYY-MM-DD) del último día de pedidos; por defecto ahora")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    if args.end is not None:
+        end = datetime.combine(args.end + timedelta(days=1), datetime.min.time(), timezone.utc)
+    else:
+        end = models.utcnow()
+
+    Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    rng = random.Random(args.seed)
+    writer = BulkWriter(args.chunk_size)
+    started = time.perf_counter()
+
+    def report(done: int) -> None:
+        elapsed = time.perf_counter() - started
+        print(f"  {done}/{args.orders} pedidos ({done / elapsed:,.0f}/s)", flush=True)
+
+    try:
+        catalog = seed_catalog(writer, rng, args.restaurants)
+        customers = seed_customers(writer, rng, args.customers)
+        seed_orders(writer, rng, catalog, customers, args.orders, end, args.days, progress=report)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(writer.rows_written.values())
+    for table, count in writer.rows_written.items():
+        print(f"{table}: {count}")
+    print(f"{total} filas en {elapsed:.1f}s ({total / elapsed:,.0f} filas/s)")
+
+
+if __name__ == "__main__":
+    main()
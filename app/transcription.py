@@ -0,0 +1,240 @@
+# app/transcription.py
+"""
+Transcripción por trozos de grabaciones largas (WAV o PCM sin cabecera).
+
+Una nota de voz de varios minutos enviada de una vez espera a una única
+llamada larga a OpenAI y, si esa llamada hace timeout, se pierde todo. Aquí
+se corta el audio en los silencios (detección por energía con `wave` y
+`array`, sin ffmpeg), se transcriben los trozos en paralelo con un límite
+por petición (TRANSCRIBE_CHUNK_CONCURRENCY) y pasando por
+`transcription_admission`, que pone el límite global y los reintentos, y
+se unen los textos en orden. Cada trozo se reintenta por separado, y los
+resultados se pueden ir enviando según terminan.
+"""
+import asyncio
+import io
+import os
+import wave
+from array import array
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from . import voice
+from .admission import transcription_admission
+
+TRANSCRIBE_CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "30"))
+TRANSCRIBE_CHUNK_MAX_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_MAX_SECONDS", "60"))
+TRANSCRIBE_CHUNK_CONCURRENCY = int(os.getenv("TRANSCRIBE_CHUNK_CONCURRENCY", "4"))
+
+FRAME_MS = 20
+MIN_SILENCE_MS = 300
+# Por debajo, una ventana de FRAME_MS no llega a una muestra
+MIN_RATE = 1000 // FRAME_MS
+# Muestras por segundo usadas para medir la energía (basta para voz)
+_ENERGY_RATE = 4000
+
+_ARRAY_TYPES = {1: "b", 2: "h", 4: "i"}
+
+
+class UnsupportedAudio(ValueError):
+    pass
+
+
+@dataclass
+class AudioFormat:
+    channels: int
+    sample_width: int  # bytes por muestra
+    rate: int
+    big_endian: bool = False  # audio/L16; WAV y audio/pcm son little-endian
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_width
+
+
+@dataclass
+class AudioChunk:
+    index: int
+    start: float  # segundos
+    end: float
+    wav: bytes
+
+
+def _check_format(audio_format: AudioFormat, description: str) -> None:
+    if audio_format.channels <= 0 or audio_format.rate < MIN_RATE:
+        raise UnsupportedAudio(f"Invalid {description}: {audio_format.channels} channels at {audio_format.rate} Hz")
+
+
+def parse_pcm_content_type(content_type: str) -> Optional[AudioFormat]:
+    """
+    `audio/L16; rate=16000; channels=1` (RFC 2586: muestras de 16 bits
+    big-endian) o `audio/pcm; rate=...` (16 bits little-endian, el orden de WAV).
+    """
+    media_type, *params = [p.strip() for p in content_type.split(";")]
+    if media_type.lower() not in ("audio/l16", "audio/pcm"):
+        return None
+    options = {k.strip().lower(): v.strip() for k, v in (p.split("=", 1) for p in params if "=" in p)}
+    try:
+        channels = int(options.get("channels", "1"))
+        rate = int(options.get("rate", "16000"))
+    except ValueError:
+        raise UnsupportedAudio(f"Invalid PCM parameters: {content_type}")
+    audio_format = AudioFormat(
+        channels=channels, sample_width=2, rate=rate, big_endian=media_type.lower() == "audio/l16",
+    )
+    _check_format(audio_format, "PCM parameters")
+    return audio_format
+
+
+def read_audio(audio_bytes: bytes, content_type: Optional[str]) -> Tuple[AudioFormat, bytes]:
+    """Devuelve (formato, muestras PCM) de un WAV o de PCM con su content type."""
+    pcm_format = parse_pcm_content_type(content_type or "")
+    if pcm_format is not None:
+        if pcm_format.big_endian:
+            # Al orden de WAV: se intercambian los bytes de cada muestra
+            samples = array("h")
+            samples.frombytes(audio_bytes[:len(audio_bytes) - len(audio_bytes) % 2])
+            samples.byteswap()
+            audio_bytes = samples.tobytes()
+            pcm_format = AudioFormat(pcm_format.channels, pcm_format.sample_width, pcm_format.rate)
+        return pcm_format, audio_bytes
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as reader:
+            audio_format = AudioFormat(reader.getnchannels(), reader.getsampwidth(), reader.getframerate())
+            frames = reader.readframes(reader.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise UnsupportedAudio(f"Only WAV or raw PCM audio can be chunked: {e}")
+    _check_format(audio_format, "WAV header")
+    if audio_format.sample_width not in _ARRAY_TYPES:
+        raise UnsupportedAudio(f"Unsupported sample width: {audio_format.sample_width}")
+    return audio_format, frames
+
+
+def to_wav(audio_format: AudioFormat, frames: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(audio_format.channels)
+        writer.setsampwidth(audio_format.sample_width)
+        writer.setframerate(audio_format.rate)
+        writer.writeframes(frames)
+    return buffer.getvalue()
+
+
+def frame_energies(audio_format: AudioFormat, frames: bytes) -> List[float]:
+    """Energía media de cada ventana de FRAME_MS, submuestreada a ~_ENERGY_RATE Hz."""
+    samples = array(_ARRAY_TYPES[audio_format.sample_width])
+    usable = len(frames) - len(frames) % audio_format.sample_width
+    samples.frombytes(frames[:usable])
+    if audio_format.sample_width == 1:
+        # WAV de 8 bits es sin signo: centrar en 0
+        samples = array("h", (s + 128 if s < 0 else s - 128 for s in samples))
+
+    window = audio_format.rate * FRAME_MS // 1000 * audio_format.channels
+    # Sólo el primer canal y una de cada `step` muestras
+    step = max(1, audio_format.rate // _ENERGY_RATE) * audio_format.channels
+    energies = []
+    for start in range(0, len(samples), window):
+        part = samples[start:start + window:step]
+        energies.append(sum(s * s for s in part) / len(part) if part else 0.0)
+    return energies
+
+
+def silence_cuts(energies: List[float]) -> List[int]:
+    """Ventanas donde cortar: el centro de cada silencio de al menos MIN_SILENCE_MS."""
+    if not energies:
+        return []
+    # Umbral relativo al ruido de fondo de la propia grabación
+    noise_floor = sorted(energies)[len(energies) // 10]
+    threshold = max(noise_floor * 4, 1e-9)
+    min_frames = MIN_SILENCE_MS // FRAME_MS
+
+    cuts = []
+    run_start = None
+    for i, energy in enumerate(energies + [threshold]):  # centinela: cierra el último silencio
+        if energy < threshold:
+            if run_start is None:
+                run_start = i
+        elif run_start is not None:
+            if i - run_start >= min_frames:
+                cuts.append((run_start + i) // 2)
+            run_start = None
+    return cuts
+
+
+def split_audio(
+    audio_bytes: bytes,
+    content_type: Optional[str] = None,
+    target_seconds: float = TRANSCRIBE_CHUNK_SECONDS,
+    max_seconds: float = TRANSCRIBE_CHUNK_MAX_SECONDS,
+) -> List[AudioChunk]:
+    """
+    Trocea el audio en WAVs de unos `target_seconds`, cortando en silencios.
+
+    Para cada trozo se elige el silencio más cercano a `target_seconds` entre
+    la mitad del objetivo y `max_seconds`; si no hay ninguno se corta en
+    `max_seconds`. Un audio más corto que `max_seconds` es un único trozo.
+    """
+    audio_format, frames = read_audio(audio_bytes, content_type)
+    frames_per_window = audio_format.rate * FRAME_MS // 1000
+    window_bytes = frames_per_window * audio_format.frame_size
+    windows_per_second = 1000 / FRAME_MS
+    total_windows = -(-len(frames) // window_bytes)
+
+    target = int(target_seconds * windows_per_second)
+    longest = int(max_seconds * windows_per_second)
+    cuts = silence_cuts(frame_energies(audio_format, frames)) if total_windows > longest else []
+
+    bounds = []
+    start = 0
+    while total_windows - start > longest:
+        candidates = [c for c in cuts if start + target // 2 <= c <= start + longest]
+        end = min(candidates, key=lambda c: abs(c - start - target)) if candidates else start + longest
+        bounds.append((start, end))
+        start = end
+    bounds.append((start, total_windows))
+
+    return [
+        AudioChunk(
+            index=index,
+            start=round(begin / windows_per_second, 2),
+            end=round(min(end * window_bytes, len(frames)) / audio_format.frame_size / audio_format.rate, 2),
+            wav=to_wav(audio_format, frames[begin * window_bytes:end * window_bytes]),
+        )
+        for index, (begin, end) in enumerate(bounds)
+    ]
+
+
+def join_texts(texts: List[str]) -> str:
+    return " ".join(t.strip() for t in texts if t and t.strip())
+
+
+async def transcribe_chunks(
+    chunks: List[AudioChunk],
+    filename: str = "audio.wav",
+    concurrency: int = TRANSCRIBE_CHUNK_CONCURRENCY,
+) -> AsyncIterator[Tuple[AudioChunk, Union[str, Exception]]]:
+    """
+    Transcribe los trozos en paralelo y los va devolviendo según terminan
+    (no en orden). Un trozo que falla devuelve la excepción sin parar el resto.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    stem = filename.rsplit(".", 1)[0]
+
+    async def transcribe(chunk: AudioChunk) -> Tuple[AudioChunk, Union[str, Exception]]:
+        async with semaphore:
+            try:
+                text = await transcription_admission.run(
+                    voice.transcribe_bytes, f"{stem}-{chunk.index}.wav", chunk.wav, "audio/wav"
+                )
+            except Exception as e:
+                return chunk, e
+            return chunk, text
+
+    tasks = [asyncio.create_task(transcribe(chunk)) for chunk in chunks]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # El cliente se ha ido o ha fallado algo: no seguir gastando upstream
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,28 @@
+# app/voice.py
+"""Llamadas a OpenAI para voz, compartidas por los routers y los trabajos."""
+from openai import OpenAI
+import os
+
+# Los reintentos los gestiona admission (con jitter y circuit breaker)
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+
+def synthesize_speech(text: str) -> bytes:
+    # Llamada TTS → devuelve HttpxBinaryResponseContent
+    response = client.audio.speech.create(
+        model="gpt-4o-mini-tts",
+        input=text,
+        voice="verse",
+        response_format="mp3",
+    )
+
+    # EXTRAER BYTES CORRECTAMENTE
+    return response.read()   # 🔥 ESTE ES EL PUNTO CLAVE
+
+
+def transcribe_bytes(filename: str, audio_bytes: bytes, content_type: str) -> str:
+    response = client.audio.transcriptions.create(
+        file=(filename, audio_bytes, content_type),
+        model="gpt-4o-transcribe",
+    )
+    return response.text
@@ -0,0 +1,27 @@
+# benchmarks/__init__.py
+"""
+Scripts de medición de rendimiento. Cada uno crea su propia base SQLite
+temporal (o usa BENCH_DATABASE_URL) y no necesita OpenAI:
+
+    python -m benchmarks.ingest_orders
+    python -m benchmarks.jobs_queue
+    python -m benchmarks.pricing
+    python -m benchmarks.chunked_transcription
+    python -m benchmarks.reads
+"""
+import os
+import tempfile
+
+
+def setup_env(name: str, **env: str) -> str:
+    """Prepara el entorno antes de importar `app` y devuelve la URL de la base."""
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url is None:
+        path = os.path.join(tempfile.gettempdir(), f"bench_{name}.db")
+        if os.path.exists(path):
+            os.remove(path)
+        url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    os.environ.update(env)
+    return url
@@ -0,0 +1,104 @@
+# benchmarks/chunked_transcription.py
+"""
+Tiempo de reloj de una grabación larga transcrita de una vez frente a por
+trozos en paralelo (app/transcription.py):
+
+    python -m benchmarks.chunked_transcription --seconds 180
+
+No llama a OpenAI: `voice.transcribe_bytes` se sustituye por una espera de
+`--base-latency` + `--per-second` × duración del audio, que imita lo que tarda
+el upstream. El audio es sintético (tramos de tono con ruido separados por
+silencios), así que también se comprueba que ningún corte cae dentro de un
+tramo con voz. Se mide a nivel de función: el TestClient de Starlette añade
+retrasos que crecen con el número de peticiones.
+"""
+import argparse
+import asyncio
+import io
+import math
+import random
+import time
+import wave
+from array import array
+from typing import List, Optional, Tuple
+
+from . import setup_env
+
+RATE = 16000
+
+
+def synthetic_speech(seconds: float, seed: int = 1) -> Tuple[bytes, List[Tuple[float, float]]]:
+    """WAV mono de 16 bits y los tramos (inicio, fin) que tienen "voz"."""
+    rng = random.Random(seed)
+    samples = array("h")
+    spans = []
+    while len(samples) < seconds * RATE:
+        start = len(samples)
+        freq = rng.uniform(150, 300)
+        for i in range(int(rng.uniform(2, 8) * RATE)):
+            envelope = 0.6 + 0.4 * math.sin(i / 800)
+            samples.append(int(8000 * math.sin(2 * math.pi * freq * i / RATE) * envelope + rng.gauss(0, 300)))
+        spans.append((start / RATE, len(samples) / RATE))
+        for _ in range(int(rng.uniform(0.4, 1.2) * RATE)):
+            samples.append(int(rng.gauss(0, 150)))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes(samples.tobytes())
+    return buffer.getvalue(), spans
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compara transcripción de una vez y por trozos.")
+    parser.add_argument("--seconds", type=float, default=180)
+    parser.add_argument("--base-latency", type=float, default=0.3, help="segundos por llamada")
+    parser.add_argument("--per-second", type=float, default=0.05, help="segundos por segundo de audio")
+    args = parser.parse_args(argv)
+
+    setup_env("chunked_transcription")
+    from app import transcription, voice
+    from app.admission import transcription_admission
+
+    def fake_transcribe(filename: str, data: bytes, content_type: Optional[str]) -> str:
+        with wave.open(io.BytesIO(data)) as reader:
+            duration = reader.getnframes() / reader.getframerate()
+        time.sleep(args.base_latency + args.per_second * duration)
+        return f"[{filename} {duration:.1f}s]"
+
+    voice.transcribe_bytes = fake_transcribe
+
+    audio, spans = synthetic_speech(args.seconds)
+    started = time.perf_counter()
+    chunks = transcription.split_audio(audio, "audio/wav")
+    split_ms = (time.perf_counter() - started) * 1000
+    inside = sum(
+        1 for chunk in chunks[:-1] if any(start < chunk.end < end for start, end in spans)
+    )
+    print(f"audio: {chunks[-1].end:.0f}s, {len(chunks)} trozos, troceado en {split_ms:.0f} ms, "
+          f"cortes dentro de voz: {inside}")
+
+    async def single() -> float:
+        started = time.perf_counter()
+        await transcription_admission.run(voice.transcribe_bytes, "audio.wav", audio, "audio/wav")
+        return time.perf_counter() - started
+
+    async def chunked() -> Tuple[float, float]:
+        started = time.perf_counter()
+        first = None
+        async for _ in transcription.transcribe_chunks(chunks):
+            if first is None:
+                first = time.perf_counter() - started
+        return first, time.perf_counter() - started
+
+    single_s = asyncio.run(single())
+    first_s, chunked_s = asyncio.run(chunked())
+    print(f"de una vez: {single_s:.2f}s")
+    print(f"por trozos: {chunked_s:.2f}s (primer trozo a los {first_s:.2f}s), "
+          f"{single_s / chunked_s:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
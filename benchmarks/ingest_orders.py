@@ -0,0 +1,85 @@
+# benchmarks/ingest_orders.py
+"""
+Pedidos por segundo en `POST /orders/` con escritura directa y con group
+commit (ver app/ingest.py), con muchos clientes concurrentes:
+
+    python -m benchmarks.ingest_orders --orders 3000 --concurrency 200
+
+Cada modo se ejecuta en un proceso aparte porque ORDER_INGEST_MODE se lee al
+importar la aplicación. Uno de cada 50 pedidos lleva un plato inexistente
+para medir también los rechazos individuales dentro de un lote.
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from . import setup_env
+
+MENU_SIZE = 20
+
+
+async def _run(orders: int, concurrency: int) -> None:
+    import httpx
+
+    from app import models
+    from app.database import SessionLocal
+    from app.ingest import ORDER_INGEST_MODE
+    from app.main import app
+
+    db = SessionLocal()
+    db.add(models.Restaurant(name="Bench"))
+    db.add(models.Customer(name="Bench"))
+    db.add_all([
+        models.MenuItem(restaurant_id=1, name=f"Plato {i}", price=5, effective_price=5)
+        for i in range(MENU_SIZE)
+    ])
+    db.commit()
+    db.close()
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            semaphore = asyncio.Semaphore(concurrency)
+            codes: Dict[int, int] = {}
+
+            async def order(i: int) -> None:
+                items = [
+                    {"menu_item_id": i % MENU_SIZE + 1, "quantity": 2},
+                    {"menu_item_id": 999 if i % 50 == 0 else 3, "quantity": 1},
+                ]
+                async with semaphore:
+                    r = await client.post("/orders/", json={"restaurant_id": 1, "customer_id": 1, "items": items})
+                codes[r.status_code] = codes.get(r.status_code, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*[order(i) for i in range(orders)])
+            elapsed = time.perf_counter() - started
+
+    print(f"{ORDER_INGEST_MODE:>6}: {orders / elapsed:,.0f} pedidos/s ({elapsed:.2f}s) respuestas={codes}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mide pedidos/s con escritura directa y con group commit.")
+    parser.add_argument("--orders", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--mode", choices=["direct", "group", "both"], default="both")
+    args = parser.parse_args(argv)
+
+    if args.mode == "both":
+        for mode in ("direct", "group"):
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.ingest_orders", "--mode", mode,
+                 "--orders", str(args.orders), "--concurrency", str(args.concurrency)],
+                check=True,
+            )
+        return
+
+    setup_env(f"ingest_{args.mode}", ORDER_INGEST_MODE=args.mode)
+    asyncio.run(_run(args.orders, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
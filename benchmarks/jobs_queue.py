@@ -0,0 +1,71 @@
+# benchmarks/jobs_queue.py
+"""
+Rendimiento de la cola de trabajos en la base de datos (app/jobs.py):
+trabajos/s al encolar en una sola transacción y trabajos/s procesados por un
+JobWorker con distintas concurrencias:
+
+    python -m benchmarks.jobs_queue --jobs 3000 --concurrency 1 4 8 --work-ms 0
+
+`--work-ms` simula lo que tarda cada trabajo (p.ej. una llamada a TTS); con
+0 se mide sólo el coste de la cola (reclamar, ejecutar, guardar el estado).
+"""
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+from . import setup_env
+
+JOB_KIND = "bench.sleep"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mide trabajos/s al encolar y al procesar.")
+    parser.add_argument("--jobs", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--work-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    setup_env("jobs_queue")
+    from app import jobs, models
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+
+    @jobs.handler(JOB_KIND)
+    def sleep_job(db, payload):
+        if args.work_ms:
+            time.sleep(args.work_ms / 1000)
+        return None
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for i in range(args.jobs):
+            jobs.enqueue(db, JOB_KIND, {"i": i}, priority=i % 3)
+        db.commit()
+        elapsed = time.perf_counter() - started
+        print(f"encolar: {args.jobs / elapsed:,.0f} trabajos/s")
+
+        for concurrency in args.concurrency:
+            db.query(models.Job).update({"status": "queued", "attempts": 0}, synchronize_session=False)
+            db.commit()
+            worker = jobs.JobWorker(concurrency, poll_interval=0.01)
+
+            async def process() -> float:
+                await worker.start()
+                started = time.perf_counter()
+                while worker.processed < args.jobs:
+                    await asyncio.sleep(0.01)
+                elapsed = time.perf_counter() - started
+                await worker.stop()
+                return elapsed
+
+            elapsed = asyncio.run(process())
+            print(f"procesar (concurrencia {concurrency}): {args.jobs / elapsed:,.0f} trabajos/s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
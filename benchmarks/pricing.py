@@ -0,0 +1,75 @@
+# benchmarks/pricing.py
+"""
+Tarificación de un pedido grande (app/pricing.py) frente al cálculo línea a
+línea con Decimal que hacía crud.create_order antes:
+
+    python -m benchmarks.pricing --lines 10000 --menu 500
+
+Se mide price_order con effective_price guardado y sin él (filas antiguas,
+se calcula al vuelo). No usa la base de datos.
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from . import setup_env
+
+
+def _legacy_total(lines: Sequence[Tuple[Any, int]]) -> Decimal:
+    total = Decimal("0.00")
+    for menu_item, quantity in lines:
+        unit_price = Decimal(menu_item.price)
+        if menu_item.discount:
+            unit_price = unit_price - ((Decimal(menu_item.discount) / 100) * unit_price)
+        total += unit_price * quantity
+    return total
+
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mide la tarificación de un pedido de muchas líneas.")
+    parser.add_argument("--lines", type=int, default=10_000)
+    parser.add_argument("--menu", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    setup_env("pricing")
+    from app import models, pricing
+
+    rng = random.Random(args.seed)
+    items = [
+        models.MenuItem(
+            id=item_id,
+            price=Decimal(rng.randint(100, 5000)) / 100,
+            discount=rng.choice([Decimal("5"), Decimal("10"), Decimal("12.5"), Decimal("33")])
+            if rng.random() < 0.5 else None,
+        )
+        for item_id in range(1, args.menu + 1)
+    ]
+    lines = [(rng.choice(items), rng.randint(1, 9)) for _ in range(args.lines)]
+
+    legacy = _median_ms(lambda: _legacy_total(lines), args.repeat)
+    computed = _median_ms(lambda: pricing.price_order(lines), args.repeat)
+    for item in items:
+        pricing.apply_effective_price(item)
+    stored = _median_ms(lambda: pricing.price_order(lines), args.repeat)
+
+    print(f"{args.lines:,} líneas, {args.menu} platos (mediana de {args.repeat})")
+    print(f"  Decimal línea a línea (antes): {legacy:8.2f} ms")
+    print(f"  price_order, sin guardar:      {computed:8.2f} ms")
+    print(f"  price_order, effective_price:  {stored:8.2f} ms ({legacy / stored:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
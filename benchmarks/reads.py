@@ -0,0 +1,124 @@
+# benchmarks/reads.py
+"""
+Listados grandes leídos con el ORM (crud) frente a SQLAlchemy Core
+(app/reads.py), con la misma validación y serialización de la respuesta:
+
+    python -m benchmarks.reads --rows 10000
+
+Tres listados de ~--rows filas cada uno: clientes, platos de un restaurante e
+historial de pedidos de un cliente (pedidos + líneas). Se mide el tiempo de
+consulta + validación + JSON (mediana) y el pico de memoria por fila con
+tracemalloc, cada repetición con una sesión nueva.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Any, Callable, List, Optional, Tuple
+
+from . import setup_env
+
+ITEMS_PER_ORDER = 3
+
+
+def _seed(rows: int) -> None:
+    from sqlalchemy import insert
+
+    from app import models
+    from app.database import SessionLocal
+
+    orders = rows // (ITEMS_PER_ORDER + 1)
+    with SessionLocal() as db:
+        db.execute(insert(models.Restaurant), [{"name": "Bench"}])
+        db.execute(insert(models.Customer), [
+            {"name": f"Cliente {i}", "email": f"cliente{i}@example.com", "phone": f"600{i:06d}"}
+            for i in range(rows)
+        ])
+        db.execute(insert(models.MenuItem), [
+            {"restaurant_id": 1, "name": f"Plato {i}", "description": f"Descripción del plato {i}",
+             "price": 5 + i % 20, "effective_price": 5 + i % 20}
+            for i in range(rows)
+        ])
+        db.execute(insert(models.Order), [
+            {"restaurant_id": 1, "customer_id": 1, "status": "delivered", "total_amount": 15}
+            for _ in range(orders)
+        ])
+        db.execute(insert(models.OrderItem), [
+            {"order_id": order_id, "menu_item_id": 1 + (order_id + n) % rows,
+             "quantity": 1, "unit_price": 5, "subtotal": 5}
+            for order_id in range(1, orders + 1)
+            for n in range(ITEMS_PER_ORDER)
+        ])
+        db.commit()
+
+
+def _dump_once(load: Callable[[Any], List[Any]], dump: Callable[[List[Any]], bytes]) -> bytes:
+    from app.database import SessionLocal
+
+    with SessionLocal() as db:
+        return dump(load(db))
+
+
+def _measure(load: Callable[[Any], List[Any]], dump: Callable[[List[Any]], bytes], repeat: int) -> Tuple[float, int]:
+    """(mediana en ms, pico de memoria en bytes) de consultar + validar + serializar."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        _dump_once(load, dump)
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    _dump_once(load, dump)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sorted(timings)[len(timings) // 2] * 1000, peak
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compara los listados con el ORM y con Core.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    setup_env("reads")
+    from pydantic import TypeAdapter
+
+    from app import crud, reads, schemas
+    from app.main import app  # noqa: F401  crea las tablas
+
+    _seed(args.rows)
+
+    def dumper(schema: Any) -> Callable[[List[Any]], bytes]:
+        adapter = TypeAdapter(List[schema])
+        return lambda rows: adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+    orders = args.rows // (ITEMS_PER_ORDER + 1)
+    cases = [
+        ("clientes", args.rows, schemas.CustomerRead,
+         lambda db: crud.get_customers(db, limit=args.rows),
+         lambda db: reads.customers(db, limit=args.rows)),
+        ("platos del restaurante", args.rows, schemas.MenuItemRead,
+         lambda db: crud.get_menu_items_by_restaurant(db, 1),
+         lambda db: reads.menu_items_by_restaurant(db, 1)),
+        ("historial del cliente", orders * (ITEMS_PER_ORDER + 1), schemas.OrderRead,
+         lambda db: crud.list_orders_by_customer(db, 1),
+         lambda db: reads.orders_by_customer(db, 1)),
+    ]
+
+    print(f"consulta + validación + JSON (mediana de {args.repeat}), pico de memoria con tracemalloc")
+    for name, rows, schema, orm_load, core_load in cases:
+        dump = dumper(schema)
+        # Misma respuesta byte a byte por los dos caminos
+        assert _dump_once(orm_load, dump) == _dump_once(core_load, dump), name
+        orm_ms, orm_peak = _measure(orm_load, dump, args.repeat)
+        core_ms, core_peak = _measure(core_load, dump, args.repeat)
+        print(f"  {name} ({rows:,} filas)")
+        print(f"    ORM:  {orm_ms:8.1f} ms {rows / orm_ms * 1000:10,.0f} filas/s {orm_peak / rows:7,.0f} B/fila")
+        print(f"    Core: {core_ms:8.1f} ms {rows / core_ms * 1000:10,.0f} filas/s {core_peak / rows:7,.0f} B/fila"
+              f" ({orm_ms / core_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
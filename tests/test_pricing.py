@@ -0,0 +1,77 @@
+# tests/test_pricing.py
+"""
+Propiedades de pricing.price_order sobre pedidos aleatorios (semilla fija,
+sin hypothesis): el total es exactamente la suma de los subtotales y cada
+línea está en céntimos.
+
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+"""
+import random
+from decimal import Decimal
+
+import pytest
+
+from app import models, pricing
+
+ITERATIONS = 2000
+DISCOUNTS = [None, Decimal("0"), Decimal("5"), Decimal("10"), Decimal("12.5"), Decimal("33"), Decimal("33.33")]
+
+
+def _menu(rng: random.Random, stored: bool):
+    items = []
+    for item_id in range(1, 51):
+        item = models.MenuItem(
+            id=item_id,
+            price=Decimal(rng.randint(1, 10_000)) / 100,
+            discount=rng.choice(DISCOUNTS),
+        )
+        if stored:
+            pricing.apply_effective_price(item)
+        items.append(item)
+    return items
+
+
+def _random_order(rng: random.Random, items):
+    return [(rng.choice(items), rng.randint(1, 50)) for _ in range(rng.randint(1, 40))]
+
+
+@pytest.mark.parametrize("stored", [True, False], ids=["stored", "computed"])
+def test_total_is_sum_of_subtotals(stored):
+    rng = random.Random(2028)
+    items = _menu(rng, stored)
+    for _ in range(ITERATIONS):
+        lines = _random_order(rng, items)
+        priced = pricing.price_order(lines)
+
+        assert priced.total == sum((line.subtotal for line in priced.lines), Decimal("0"))
+        assert [(line.menu_item_id, line.quantity) for line in priced.lines] == [
+            (item.id, quantity) for item, quantity in lines
+        ]
+        for line in priced.lines:
+            assert line.unit_price == line.unit_price.quantize(pricing.CENT)
+            assert line.subtotal == line.unit_price * line.quantity
+
+
+def test_stored_and_computed_prices_agree():
+    rng = random.Random(2029)
+    computed = _menu(rng, stored=False)
+    stored = [
+        models.MenuItem(id=item.id, price=item.price, discount=item.discount) for item in computed
+    ]
+    for item in stored:
+        pricing.apply_effective_price(item)
+
+    for _ in range(ITERATIONS):
+        picks = [(rng.randrange(len(computed)), rng.randint(1, 50)) for _ in range(rng.randint(1, 40))]
+        assert (
+            pricing.price_order([(computed[i], q) for i, q in picks]).total
+            == pricing.price_order([(stored[i], q) for i, q in picks]).total
+        )
+
+
+def test_effective_price_rounds_half_up():
+    assert pricing.effective_price(Decimal("10.00"), None) == Decimal("10.00")
+    assert pricing.effective_price(Decimal("10.00"), Decimal("12.5")) == Decimal("8.75")
+    assert pricing.effective_price(Decimal("0.05"), Decimal("50")) == Decimal("0.03")
+    assert pricing.effective_price(Decimal("9.99"), Decimal("33.33")) == Decimal("6.66")